@@ -19,12 +19,36 @@ Performance:
 
 import asyncio
 import logging
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import os
+import httpx
+
+from blur_detector import download_image
 
 logger = logging.getLogger(__name__)
 
+# Per-process blur detector (only used with EXECUTOR_TYPE=process)
+_process_blur_detector = None
+
+
+def _init_process_worker(blur_detector) -> None:
+    """
+    Initializer for ProcessPoolExecutor workers
+
+    Receives the detector pickled once per worker process (not per photo),
+    so the Haar cascade and HTTP session are rebuilt once per process.
+    """
+    global _process_blur_detector
+    _process_blur_detector = blur_detector
+
+
+def _analyze_in_process(data: bytes) -> Dict[str, Any]:
+    """
+    Runs analyze_from_bytes on the worker process's detector
+    """
+    return _process_blur_detector.analyze_from_bytes(data)
+
 
 class BatchProcessor:
     """
@@ -38,15 +62,80 @@ class BatchProcessor:
         Args:
             blur_detector: BlurDetector instance
             batch_size: Number of photos to process in parallel (default: 4)
-            max_workers: Maximum number of worker threads (default: 4)
+            max_workers: Maximum number of worker threads/processes (default: 4)
+
+        EXECUTOR_TYPE environment variable:
+        - thread (default): ThreadPoolExecutor, OpenCV releases the GIL in most ops
+        - process: ProcessPoolExecutor, bypasses the GIL for the Python/NumPy
+          parts of the analysis (scales with CPU cores)
         """
         self.blur_detector = blur_detector
         self.batch_size = int(os.getenv('BATCH_SIZE', batch_size))
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.executor_type = os.getenv('EXECUTOR_TYPE', 'thread').lower()
+
+        if self.executor_type == 'process':
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_process_worker,
+                initargs=(blur_detector,)
+            )
+            self._analyze_fn = _analyze_in_process
+        else:
+            self.executor_type = 'thread'
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._analyze_fn = blur_detector.analyze_from_bytes
+
+        # Async HTTP client (created lazily on first use, inside the event loop)
+        # Downloads run on the event loop; only CV work goes to the executor
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+        # Caps images in flight in the executor to max_workers
+        # (created lazily so it binds to the running event loop)
+        self._sem: Optional[asyncio.Semaphore] = None
         
         logger.info(f"BatchProcessor initialized with batch_size={self.batch_size}, "
-                   f"max_workers={self.max_workers}")
+                   f"max_workers={self.max_workers}, executor={self.executor_type}")
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Gets or creates the pooled async HTTP client
+
+        Returns:
+            httpx.AsyncClient shared by all downloads
+        """
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_workers * 4)
+            )
+        return self._http_client
+
+    async def _download(self, image_url: str) -> bytes:
+        """
+        Downloads an image with the pooled client (see download_image)
+
+        Args:
+            image_url: URL of the image
+
+        Returns:
+            Image bytes
+        """
+        return await download_image(
+            self._get_http_client(), image_url, self.blur_detector.max_bytes
+        )
+
+    async def close(self) -> None:
+        """
+        Closes the HTTP client and shuts down the executor
+
+        Call this on application shutdown
+        """
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        self.executor.shutdown(wait=False)
     
     async def analyze_batch(self, requests: List[Dict[str, str]]) -> List[Dict[str, Any]]:
         """
@@ -100,13 +189,19 @@ class BatchProcessor:
         try:
             logger.info(f"Analyzing photo {photo_id}")
             
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self.blur_detector.analyze_from_url,
-                image_url
-            )
+            # Download on the event loop (I/O-bound, doesn't take an executor slot)
+            data = await self._download(image_url)
+
+            # Run CV work in thread/process pool to avoid blocking
+            if self._sem is None:
+                self._sem = asyncio.Semaphore(self.max_workers)
+            async with self._sem:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.executor,
+                    self._analyze_fn,
+                    data
+                )
             
             logger.info(f"✅ Photo {photo_id} analyzed: "
                        f"blur_score={result['blur_score']:.2f}, "
@@ -129,43 +224,52 @@ class BatchProcessor:
     async def analyze_batch_with_db_update(
         self,
         requests: List[Dict[str, str]],
-        update_db_func
+        update_db_func=None,
+        update_db_bulk_func=None
     ) -> List[Dict[str, Any]]:
         """
         Analyzes batch and updates database for all photos
         
         Args:
             requests: List of dicts with 'photo_id' and 'image_url'
-            update_db_func: Async function to update database
+            update_db_func: Async function to update database (one photo per call)
+            update_db_bulk_func: Async function to update database for all
+                                 results at once (preferred - one round-trip)
         
         Returns:
             List of results with database update status
         """
         # Analyze all photos in parallel
         results = await self.analyze_batch(requests)
+        successful = [r for r in results if r.get('success')]
         
-        # Update database for all photos in parallel
-        logger.info(f"📝 Updating database for {len(results)} photos")
-        
-        db_updates = []
-        for result in results:
-            if result.get('success'):
-                db_updates.append(
-                    update_db_func(
-                        photo_id=result['photo_id'],
-                        is_blurry=result['is_blurry'],
-                        blur_score=result['blur_score'],
-                        quality_score=result['quality_score'],
-                        has_faces=result.get('has_faces', False),
-                        face_count=result.get('face_count', 0),
-                        exposure_score=result.get('exposure_score', None)
-                    )
+        logger.info(f"📝 Updating database for {len(successful)} photos")
+
+        if update_db_bulk_func is not None:
+            # OPTIMIZATION: Single round-trip for the whole batch
+            try:
+                await update_db_bulk_func(successful)
+            except Exception as e:
+                logger.error(f"Bulk database update failed: {str(e)}")
+        elif update_db_func is not None:
+            # Update database for all photos in parallel
+            db_updates = [
+                update_db_func(
+                    photo_id=result['photo_id'],
+                    is_blurry=result['is_blurry'],
+                    blur_score=result['blur_score'],
+                    quality_score=result['quality_score'],
+                    has_faces=result.get('has_faces', False),
+                    face_count=result.get('face_count', 0),
+                    exposure_score=result.get('exposure_score', None)
                 )
+                for result in successful
+            ]
+
+            # Wait for all database updates
+            await asyncio.gather(*db_updates, return_exceptions=True)
         
-        # Wait for all database updates
-        await asyncio.gather(*db_updates, return_exceptions=True)
-        
-        logger.info(f"✅ Database updated for {len(db_updates)} photos")
+        logger.info(f"✅ Database updated for {len(successful)} photos")
         
         return results
 
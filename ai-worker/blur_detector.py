@@ -16,6 +16,12 @@ How it works:
 4. High variance = sharp edges = not blurry
 5. Low variance = no sharp edges = blurry
 
+Hot path (per photo, all OpenCV SIMD kernels, no Python pixel loops):
+- Decode (reduced-scale for large JPEGs) -> downsample to max_image_size
+- One grayscale conversion into a reused buffer
+- CV_16S Laplacian of the center region into a reused buffer
+- Full-image Laplacian only when the center is not already sharp
+
 Why Laplacian Variance?
 - Simple and effective
 - Fast computation
@@ -24,14 +30,159 @@ Why Laplacian Variance?
 """
 
 import cv2
+import httpx
 import numpy as np
-import requests
-from io import BytesIO
-from PIL import Image
 import logging
+import threading
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# JPEG start-of-frame markers (carry image height/width)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Optional: PyTurboJPEG calls libjpeg-turbo directly (faster than cv2.imdecode)
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except Exception:
+    _turbo_jpeg = None
+
+# libjpeg-turbo decode-time scale factors supported by cv2.imdecode
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def jpeg_dimensions(data: bytes) -> Optional[tuple[int, int]]:
+    """
+    Reads (height, width) from a JPEG header without decoding pixels
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        (height, width), or None if data is not a JPEG or has no SOF marker
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            # Standalone markers (no length)
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            return height, width
+        i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+
+    return None
+
+
+def decode_image(data: bytes, max_image_size: Optional[int] = None,
+                 apply_orientation: bool = False) -> Optional[np.ndarray]:
+    """
+    Decodes image bytes to a BGR array (OpenCV format)
+
+    OPTIMIZATION: For JPEGs much larger than max_image_size, decodes directly
+    at 1/2, 1/4 or 1/8 scale in libjpeg-turbo (skips most of the IDCT work
+    and never allocates the full-resolution pixel buffer). The result keeps
+    at least 2x headroom over max_image_size: libjpeg's scaled IDCT drops
+    high-frequency detail, and decoding to just above max_image_size lowers
+    blur scores by 23-50%. With 2x headroom the INTER_AREA downsample does
+    the final reduction and scores stay within ~5% of a full decode, so the
+    tuned thresholds still apply.
+
+    If PyTurboJPEG is installed, JPEGs on this path are decoded by calling
+    libjpeg-turbo directly. It ignores EXIF orientation, which is fine for
+    blur scoring (the Laplacian is rotation-symmetric) but not for face
+    detection (Haar cascades only find upright faces). Callers that need
+    upright pixels pass apply_orientation=True, and full-resolution decodes
+    (deblur output) always use cv2.imdecode, which applies EXIF orientation.
+
+    Args:
+        data: Encoded image bytes
+        max_image_size: Target maximum dimension (None = full resolution)
+        apply_orientation: Return the image rotated per EXIF orientation
+
+    Returns:
+        BGR image array, or None if decoding failed
+    """
+    flags = cv2.IMREAD_COLOR
+
+    if max_image_size:
+        dims = jpeg_dimensions(data)
+        if dims is not None:
+            max_dim = max(dims)
+            scale = 1
+            for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+                if max_dim // factor >= 2 * max_image_size:
+                    flags = reduced_flag
+                    scale = factor
+                    break
+
+            if _turbo_jpeg is not None and not apply_orientation:
+                try:
+                    return _turbo_jpeg.decode(
+                        data,
+                        pixel_format=TJPF_BGR,
+                        scaling_factor=(1, scale) if scale > 1 else None
+                    )
+                except Exception as e:
+                    logger.warning(f"TurboJPEG decode failed, using OpenCV: {str(e)}")
+
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+async def download_image(client: httpx.AsyncClient, image_url: str, max_bytes: int) -> bytes:
+    """
+    Downloads an image asynchronously, rejecting anything larger than max_bytes
+
+    Checks Content-Length first, then streams with a running size cap
+    so oversized payloads are never fully buffered.
+
+    Args:
+        client: Shared httpx.AsyncClient
+        image_url: URL of the image
+        max_bytes: Maximum allowed size in bytes
+
+    Returns:
+        Image bytes
+
+    Raises:
+        ValueError: If the image is too large
+    """
+    async with client.stream('GET', image_url) as response:
+        response.raise_for_status()
+
+        content_length = int(response.headers.get('Content-Length', 0))
+        if content_length > max_bytes:
+            raise ValueError(f"Image too large: {content_length} bytes "
+                             f"(max {max_bytes})")
+
+        chunks = []
+        total = 0
+        async for chunk in response.aiter_bytes():
+            total += len(chunk)
+            if total > max_bytes:
+                raise ValueError(f"Image too large: over {max_bytes} bytes")
+            chunks.append(chunk)
+
+    return b''.join(chunks)
+
 
 class BlurDetector:
     """
@@ -47,7 +198,9 @@ class BlurDetector:
     """
     
     def __init__(self, threshold: float = 150.0, enable_face_detection: bool = False,
-                 max_image_size: int = 1280, enable_exposure_score: bool = False):
+                 max_image_size: int = 1280, enable_exposure_score: bool = False,
+                 max_bytes: int = 20 * 1024 * 1024,
+                 use_opencl: bool = False):
         """
         Initialize blur detector
 
@@ -56,6 +209,8 @@ class BlurDetector:
             enable_face_detection: Whether to detect faces (slower, optional)
             max_image_size: Maximum image dimension for downsampling (faster processing)
             enable_exposure_score: Whether to calculate exposure score (slower, optional)
+            max_bytes: Maximum download size; larger images are rejected before decoding
+            use_opencl: Run the Laplacian on the GPU via OpenCL (cv2.UMat) when available
 
         TUNED FOR SPORTS PHOTOGRAPHY:
         - 150.0: Current setting (strict - only truly sharp photos marked CLEAN)
@@ -71,11 +226,111 @@ class BlurDetector:
         self.threshold = threshold
         self.enable_face_detection = enable_face_detection
         self.max_image_size = max_image_size
+        self.max_bytes = max_bytes
         self.enable_exposure_score = enable_exposure_score
+
+        # OpenCL (transparent API): probed on first use, see _opencl_enabled
+        self.use_opencl = use_opencl
+        self._opencl_ready: Optional[bool] = None
+
+        # Per-thread grayscale/Laplacian buffers, reused across photos of the
+        # same size instead of allocating ~7MB per photo, and per-thread
+        # Haar Cascade classifiers (loaded once per thread, not per photo)
+        self._buf_pool = threading.local()
+        self._load_face_cascade()
+
         logger.info(f"BlurDetector initialized with threshold={threshold}, "
                    f"face_detection={enable_face_detection}, max_size={max_image_size}, "
-                   f"exposure_score={enable_exposure_score}")
+                   f"exposure_score={enable_exposure_score}, opencl={self.use_opencl}")
     
+    def _load_face_cascade(self) -> None:
+        """
+        Loads the Haar Cascade classifier if face detection is enabled
+
+        This is a pre-trained model for face detection. Disables face
+        detection if the cascade file cannot be loaded.
+        """
+        if not self.enable_face_detection:
+            return
+
+        if self._get_face_cascade() is None:
+            logger.warning("⚠️ Haar cascade not available. Disabling face detection.")
+            self.enable_face_detection = False
+
+    def _get_face_cascade(self) -> Optional[cv2.CascadeClassifier]:
+        """
+        Gets this thread's Haar Cascade classifier, loading it on first use
+
+        CascadeClassifier.detectMultiScale is not thread-safe, so each
+        thread gets its own instance.
+
+        Returns:
+            The classifier, or None if the cascade file cannot be loaded
+        """
+        pool = self._buf_pool
+        cascade = getattr(pool, 'face_cascade', None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            )
+            if cascade.empty():
+                return None
+            pool.face_cascade = cascade
+        return cascade
+
+    def __getstate__(self) -> dict:
+        """
+        Makes the detector picklable (for ProcessPoolExecutor workers)
+
+        Thread-local buffers and classifiers cannot be pickled, so they are
+        dropped here and recreated in the receiving process by __setstate__.
+        """
+        state = self.__dict__.copy()
+        state['_opencl_ready'] = None
+        del state['_buf_pool']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._buf_pool = threading.local()
+        self._load_face_cascade()
+
+    def _opencl_enabled(self) -> bool:
+        """
+        Whether the Laplacian runs on the GPU via OpenCL
+
+        Probed on first use rather than in __init__: the API process creates
+        a detector before its CV process pool forks, and an OpenCL context
+        initialized in a parent process is not usable in forked children.
+        Falls back to the CPU path if no OpenCL device is available.
+        """
+        if self._opencl_ready is None:
+            self._opencl_ready = self.use_opencl and cv2.ocl.haveOpenCL()
+            if self.use_opencl and not self._opencl_ready:
+                logger.warning("⚠️ OpenCL not available. Using CPU blur detection.")
+            if self._opencl_ready:
+                cv2.ocl.setUseOpenCL(True)
+        return self._opencl_ready
+
+    def _get_buffers(self, shape: tuple) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gets this thread's grayscale and Laplacian buffers for an image shape
+
+        Buffers are reallocated only when the image size changes.
+
+        Args:
+            shape: (height, width) of the image
+
+        Returns:
+            Tuple of (gray_buf uint8, lap_buf int16)
+        """
+        pool = self._buf_pool
+        if getattr(pool, 'shape', None) != shape:
+            pool.shape = shape
+            pool.gray = np.empty(shape, dtype=np.uint8)
+            pool.lap = np.empty(shape, dtype=np.int16)
+        return pool.gray, pool.lap
+
     def detect_blur(self, image_path: str) -> dict:
         """
         Detects blur in an image file
@@ -132,7 +387,10 @@ class BlurDetector:
             new_width = int(width * scale)
             new_height = int(height * scale)
 
-            # Downsample using high-quality interpolation
+            # INTER_AREA averages source pixels instead of sampling them:
+            # no aliasing, so Laplacian variance (and the tuned thresholds)
+            # stays consistent at any downscale factor. Large JPEGs are
+            # already reduced at decode time, so the remaining ratio is small.
             downsampled = cv2.resize(image, (new_width, new_height),
                                     interpolation=cv2.INTER_AREA)
             logger.info(f"📉 Downsampled image from {width}x{height} to {new_width}x{new_height}")
@@ -140,83 +398,76 @@ class BlurDetector:
 
         return image
     
-    def analyze_from_url(self, image_url: str) -> dict:
+    def analyze_from_bytes(self, data: bytes) -> dict:
         """
-        Downloads and analyzes an image from URL
+        Decodes and analyzes already-downloaded image bytes
 
-        This is the main method used by the API.
-
-        PERFORMANCE OPTIMIZATIONS:
-        - Downsamples large images (saves ~200ms)
-        - Skips face detection by default (saves ~500ms)
-        - Uses fast blur detection (Laplacian variance)
+        Callers download asynchronously (see download_image) and run only
+        this in an executor, so network I/O overlaps with CV work.
 
         Args:
-            image_url: URL of the image to analyze
+            data: Encoded image bytes (JPEG, PNG, ...)
 
         Returns:
             Dictionary with analysis results including quality score
         """
-        try:
-            # Download image
-            logger.info(f"⬇️ Downloading image from {image_url}")
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-
-            # Convert to OpenCV format
-            image_pil = Image.open(BytesIO(response.content))
-            image_array = np.array(image_pil)
-
-            # Convert RGB to BGR (OpenCV format)
-            if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-
-            # OPTIMIZATION: Downsample large images for faster processing
-            image_array = self._downsample_image(image_array)
-
-            # Analyze blur (fast - ~50ms)
-            logger.info("🔍 Analyzing blur...")
-            blur_result = self._analyze_image(image_array)
-
-            # Calculate exposure score (optional - ~50ms)
-            if self.enable_exposure_score:
-                logger.info("📊 Calculating exposure score...")
-                exposure_score = self._calculate_exposure_score(image_array)
-            else:
-                exposure_score = 100.0  # Default to perfect exposure if disabled
-
-            # OPTIMIZATION: Skip face detection by default (saves ~500ms)
-            # Face detection is optional and can be enabled if needed
-            if self.enable_face_detection:
-                logger.info("👤 Detecting faces...")
-                has_faces, face_count = self._detect_faces(image_array)
-            else:
-                has_faces, face_count = False, 0
+        # Decode straight to BGR (OpenCV format) - no PIL round-trip
+        # Large JPEGs are decoded at reduced scale
+        # Face detection needs upright faces, so EXIF orientation must be applied
+        image_array = decode_image(data, self.max_image_size,
+                                   apply_orientation=self.enable_face_detection)
+
+        if image_array is None:
+            raise ValueError("Could not decode image")
+
+        # OPTIMIZATION: Downsample large images for faster processing
+        # Done here (not only in _analyze_image) so exposure and face
+        # detection also run on the smaller image
+        image_array = self._downsample_image(image_array)
+
+        # OPTIMIZATION: Convert to grayscale once, shared by blur, exposure
+        # and face detection
+        gray = self._to_gray(image_array)
+
+        # Analyze blur (fast - ~50ms)
+        logger.info("🔍 Analyzing blur...")
+        blur_result = self._analyze_gray(gray)
+
+        # Calculate exposure score (optional - ~50ms)
+        if self.enable_exposure_score:
+            logger.info("📊 Calculating exposure score...")
+            exposure_score = self._calculate_exposure_score(gray)
+        else:
+            exposure_score = 100.0  # Default to perfect exposure if disabled
 
-            # Calculate overall quality score
-            quality_score = self._calculate_quality_score(
-                blur_score=blur_result['blur_score'],
-                exposure_score=exposure_score,
-                has_faces=has_faces
-            )
+        # OPTIMIZATION: Skip face detection by default (saves ~500ms)
+        # Face detection is optional and can be enabled if needed
+        if self.enable_face_detection:
+            logger.info("👤 Detecting faces...")
+            has_faces, face_count = self._detect_faces(gray)
+        else:
+            has_faces, face_count = False, 0
 
-            # Combine results
-            result = {
-                **blur_result,
-                'quality_score': quality_score,
-                'exposure_score': exposure_score,
-                'has_faces': has_faces,
-                'face_count': face_count,
-            }
+        # Calculate overall quality score
+        quality_score = self._calculate_quality_score(
+            blur_score=blur_result['blur_score'],
+            exposure_score=exposure_score,
+            has_faces=has_faces
+        )
 
-            logger.info(f"✅ Analysis complete: blur_score={blur_result['blur_score']:.2f}, "
-                       f"quality={quality_score:.1f}, is_blurry={blur_result['is_blurry']}")
+        # Combine results
+        result = {
+            **blur_result,
+            'quality_score': quality_score,
+            'exposure_score': exposure_score,
+            'has_faces': has_faces,
+            'face_count': face_count,
+        }
 
-            return result
+        logger.info(f"✅ Analysis complete: blur_score={blur_result['blur_score']:.2f}, "
+                   f"quality={quality_score:.1f}, is_blurry={blur_result['is_blurry']}")
 
-        except Exception as e:
-            logger.error(f"Error analyzing image from URL: {str(e)}")
-            raise
+        return result
     
     def _analyze_image(self, image: np.ndarray) -> dict:
         """
@@ -226,7 +477,7 @@ class BlurDetector:
 
         Strategy:
         1. Analyze center region (where subject usually is)
-        2. Analyze full image
+        2. Analyze full image (skipped if center is already sharp)
         3. If center is sharp, classify as CLEAN (even if background is blurry)
         4. Only mark as BLURRY if entire image lacks sharp edges
 
@@ -240,9 +491,35 @@ class BlurDetector:
         Returns:
             Dictionary with blur analysis results
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # OPTIMIZATION: Downsample for every entry point (no-op if already small)
+        image = self._downsample_image(image)
+
+        return self._analyze_gray(self._to_gray(image))
+
+    def _to_gray(self, image: np.ndarray) -> np.ndarray:
+        """
+        Converts a BGR image to grayscale into this thread's reused buffer
+
+        Args:
+            image: OpenCV image array (BGR)
+
+        Returns:
+            Grayscale image (valid until the next call on this thread)
+        """
+        gray_buf, _ = self._get_buffers(image.shape[:2])
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+
+    def _analyze_gray(self, gray: np.ndarray) -> dict:
+        """
+        Blur analysis on a precomputed grayscale image (see _analyze_image)
+
+        Args:
+            gray: Grayscale image array
 
+        Returns:
+            Dictionary with blur analysis results
+            (full_variance is None when the center alone is sharp)
+        """
         # Get image dimensions
         height, width = gray.shape
 
@@ -253,15 +530,18 @@ class BlurDetector:
         center_x_start = int(width * 0.25)
         center_x_end = int(width * 0.75)
 
-        center_region = gray[center_y_start:center_y_end, center_x_start:center_x_end]
-
-        # Calculate Laplacian variance for center region
-        laplacian_center = cv2.Laplacian(center_region, cv2.CV_64F)
-        center_variance = laplacian_center.var()
-
-        # Calculate Laplacian variance for full image
-        laplacian_full = cv2.Laplacian(gray, cv2.CV_64F)
-        full_variance = laplacian_full.var()
+        if self._opencl_enabled():
+            # GPU path: one upload, one Laplacian kernel over the full image;
+            # the center variance is read from an ROI of the same result
+            laplacian_full = cv2.Laplacian(cv2.UMat(gray), cv2.CV_16S, ksize=1)
+            center_variance = self._variance(cv2.UMat(
+                laplacian_full, (center_y_start, center_y_end), (center_x_start, center_x_end)
+            ))
+        else:
+            laplacian_full = None
+            center_variance = self._center_variance(
+                gray, center_y_start, center_y_end, center_x_start, center_x_end
+            )
 
         # CRITICAL DECISION LOGIC:
         # If center region is sharp (above threshold), classify as CLEAN
@@ -270,13 +550,25 @@ class BlurDetector:
 
         if center_variance > self.threshold:
             # Center is sharp = CLEAN photo (even if background is blurry)
-            is_blurry = False
-            blur_score = center_variance  # Use center variance as score
-            confidence = 'high'
-            method = 'region_based_laplacian'
+            # OPTIMIZATION: Skip the full-image Laplacian entirely (common case)
             logger.info(f"✅ CLEAN: center_variance={center_variance:.2f} > threshold={self.threshold} (sharp subject, depth-of-field OK)")
 
-        elif full_variance > self.threshold:
+            return {
+                'is_blurry': False,
+                'blur_score': float(center_variance),  # Use center variance as score
+                'confidence': 'high',
+                'method': 'region_based_laplacian',
+                'center_variance': float(center_variance),
+                'full_variance': None,  # Not computed (center already sharp)
+            }
+
+        # Calculate Laplacian variance for full image
+        if laplacian_full is None:
+            _, lap_buf = self._get_buffers(gray.shape)
+            laplacian_full = cv2.Laplacian(gray, cv2.CV_16S, dst=lap_buf, ksize=1)
+        full_variance = self._variance(laplacian_full)
+
+        if full_variance > self.threshold:
             # Full image is sharp = CLEAN photo
             is_blurry = False
             blur_score = full_variance
@@ -312,14 +604,73 @@ class BlurDetector:
             'full_variance': float(full_variance),
         }
     
-    def _calculate_exposure_score(self, image: np.ndarray) -> float:
+    def _center_variance(self, gray: np.ndarray, y_start: int, y_end: int,
+                         x_start: int, x_end: int) -> float:
+        """
+        Laplacian variance of the center region (CPU path)
+
+        Args:
+            gray: Grayscale image array
+            y_start, y_end, x_start, x_end: Center region bounds
+
+        Returns:
+            Laplacian variance of the region
+        """
+        _, lap_buf = self._get_buffers(gray.shape)
+        height, width = gray.shape
+
+        # OPTIMIZATION: CV_16S output (4x less memory traffic than CV_64F);
+        # a 3x3 Laplacian of uint8 input always fits in int16
+        # A 1-pixel border is included so the values match the full-image
+        # Laplacian exactly (no edge-reflection artifacts)
+        pad_y_start = max(y_start - 1, 0)
+        pad_y_end = min(y_end + 1, height)
+        pad_x_start = max(x_start - 1, 0)
+        pad_x_end = min(x_end + 1, width)
+
+        padded_center = gray[pad_y_start:pad_y_end, pad_x_start:pad_x_end]
+        laplacian_padded = cv2.Laplacian(
+            padded_center, cv2.CV_16S,
+            dst=lap_buf[:pad_y_end - pad_y_start, :pad_x_end - pad_x_start],
+            ksize=1
+        )
+        laplacian_center = laplacian_padded[
+            y_start - pad_y_start:y_end - pad_y_start,
+            x_start - pad_x_start:x_end - pad_x_start
+        ]
+        return self._variance(laplacian_center)
+
+    @staticmethod
+    def _variance(laplacian: np.ndarray) -> float:
+        """
+        Calculates variance of a Laplacian response
+
+        Uses cv2.meanStdDev instead of ndarray.var(). meanStdDev accumulates
+        sum and sum-of-squares in one SIMD pass over the int16 data, while
+        ndarray.var() makes two passes over a float64 copy. This is the same
+        fused single-pass reduction a Numba kernel would give, without the
+        extra dependency or JIT warm-up.
+
+        Args:
+            laplacian: Laplacian output (CV_16S, ndarray or UMat)
+
+        Returns:
+            Variance (stddev squared)
+        """
+        _, stddev = cv2.meanStdDev(laplacian)
+        if isinstance(stddev, cv2.UMat):
+            # UMat input gives UMat outputs: read the result back first
+            stddev = stddev.get()
+        return float(stddev[0, 0]) ** 2
+
+    def _calculate_exposure_score(self, gray: np.ndarray) -> float:
         """
         Calculates exposure quality score
         
         Checks if image is too dark or too bright.
         
         Args:
-            image: OpenCV image array
+            gray: Grayscale image array
         
         Returns:
             Exposure score (0-100)
@@ -327,11 +678,9 @@ class BlurDetector:
             - 50: Slightly over/under exposed
             - 0: Severely over/under exposed
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
         # Calculate mean brightness (0-255)
-        mean_brightness = np.mean(gray)
+        # cv2.mean: single SIMD pass, no temporary accumulators
+        mean_brightness = cv2.mean(gray)[0]
         
         # Ideal brightness is around 127 (middle gray)
         # Calculate how far from ideal
@@ -344,28 +693,24 @@ class BlurDetector:
         
         return float(score)
     
-    def _detect_faces(self, image: np.ndarray) -> tuple[bool, int]:
+    def _detect_faces(self, gray: np.ndarray) -> tuple[bool, int]:
         """
         Detects faces in the image
         
         Uses Haar Cascade classifier (fast, no GPU needed)
+        loaded once per thread
         
         Args:
-            image: OpenCV image array
+            gray: Grayscale image array
         
         Returns:
             Tuple of (has_faces, face_count)
         """
+        face_cascade = self._get_face_cascade()
+        if face_cascade is None:
+            return False, 0
+
         try:
-            # Load Haar Cascade classifier
-            # This is a pre-trained model for face detection
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
             # Detect faces
             faces = face_cascade.detectMultiScale(
                 gray,
@@ -11,10 +11,10 @@ Why separate database module?
 """
 
 import os
+import asyncio
 import asyncpg
 import logging
-from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +22,27 @@ logger = logging.getLogger(__name__)
 # Using asyncpg for async PostgreSQL operations
 _db_pool: Optional[asyncpg.Pool] = None
 
+# Photo analysis UPDATE (shared by single and bulk updates)
+# Identical SQL text means asyncpg's per-connection prepared statement cache
+# hits on every call, so PostgreSQL skips parse+plan after the first photo
+# analyzedAt is set server-side (Prisma DateTime columns store UTC)
+_UPDATE_PHOTO_ANALYSIS_SQL = """
+    UPDATE "Photo"
+    SET
+        "isBlurry" = $1,
+        "blurScore" = $2,
+        "qualityScore" = $3,
+        "hasFaces" = $4,
+        "faceCount" = $5,
+        "exposureScore" = $6,
+        "photoSet" = $7,
+        "analyzedAt" = NOW() AT TIME ZONE 'UTC'
+    WHERE id = $8
+"""
+
+# Supabase client (created once, reused for every upload)
+_supabase_client = None
+
 
 async def get_db_pool() -> asyncpg.Pool:
     """
@@ -31,6 +52,7 @@ async def get_db_pool() -> asyncpg.Pool:
     - Reuses connections (faster)
     - Limits concurrent connections
     - Handles connection failures
+    - Caches prepared statements per connection (no re-parse per photo)
     
     Returns:
         asyncpg connection pool
@@ -48,7 +70,9 @@ async def get_db_pool() -> asyncpg.Pool:
             database_url,
             min_size=2,  # Minimum 2 connections
             max_size=10,  # Maximum 10 connections
-            command_timeout=60  # 60 second timeout
+            command_timeout=60,  # 60 second timeout
+            statement_cache_size=256,  # Prepared statements cached per connection
+            max_cached_statement_lifetime=0  # Never expire cached statements
         )
         
         logger.info("Database connection pool created")
@@ -102,19 +126,7 @@ async def update_photo_analysis(
         # Update photo record
         async with pool.acquire() as conn:
             await conn.execute(
-                """
-                UPDATE "Photo"
-                SET
-                    "isBlurry" = $1,
-                    "blurScore" = $2,
-                    "qualityScore" = $3,
-                    "hasFaces" = $4,
-                    "faceCount" = $5,
-                    "exposureScore" = $6,
-                    "photoSet" = $7,
-                    "analyzedAt" = $8
-                WHERE id = $9
-                """,
+                _UPDATE_PHOTO_ANALYSIS_SQL,
                 is_blurry,
                 blur_score,
                 quality_score,
@@ -122,7 +134,6 @@ async def update_photo_analysis(
                 face_count,
                 exposure_score,
                 photo_set,  # CRITICAL: Assign to BLURRY or CLEAN set
-                datetime.utcnow(),
                 photo_id
             )
 
@@ -133,6 +144,55 @@ async def update_photo_analysis(
         raise
 
 
+async def update_photo_analysis_bulk(results: List[dict]) -> None:
+    """
+    Updates many photo records with AI analysis results in one round-trip
+
+    Same UPDATE as update_photo_analysis, but sent with executemany on a
+    single connection: the statement is prepared once and all rows are
+    pipelined, instead of one pool.acquire() + UPDATE per photo.
+
+    Args:
+        results: List of dicts with photo_id, is_blurry, blur_score,
+                 quality_score and optional has_faces, face_count,
+                 exposure_score
+
+    Raises:
+        Exception: If database update fails
+    """
+    if not results:
+        return
+
+    try:
+        pool = await get_db_pool()
+
+        rows = [
+            (
+                r['is_blurry'],
+                r['blur_score'],
+                r['quality_score'],
+                r.get('has_faces', False),
+                r.get('face_count', 0),
+                r.get('exposure_score', None),
+                "BLURRY" if r['is_blurry'] else "CLEAN",  # CRITICAL: Assign to BLURRY or CLEAN set
+                r['photo_id'],
+            )
+            for r in results
+        ]
+
+        async with pool.acquire() as conn:
+            await conn.executemany(
+                _UPDATE_PHOTO_ANALYSIS_SQL,
+                rows
+            )
+
+        logger.info(f"Updated {len(rows)} photos with analysis results")
+
+    except Exception as e:
+        logger.error(f"Error bulk updating {len(results)} photos: {str(e)}")
+        raise
+
+
 async def get_photo_by_id(photo_id: str) -> Optional[dict]:
     """
     Retrieves a photo record by ID
@@ -173,20 +233,19 @@ async def get_photo_by_id(photo_id: str) -> Optional[dict]:
         raise
 
 
-async def upload_deblurred_image(photo_id: str, image_array) -> str:
+def _get_supabase():
     """
-    Uploads deblurred image to Supabase Storage
+    Gets or creates the Supabase client
 
-    Args:
-        photo_id: Photo ID
-        image_array: OpenCV image array (BGR format)
+    Building the client parses credentials and sets up HTTP sessions,
+    so it is done once instead of per upload.
 
     Returns:
-        Public URL of the deblurred image
+        Supabase client
     """
-    try:
-        import cv2
-        import io
+    global _supabase_client
+
+    if _supabase_client is None:
         from supabase import create_client
 
         # Get Supabase credentials
@@ -196,28 +255,110 @@ async def upload_deblurred_image(photo_id: str, image_array) -> str:
         if not supabase_url or not supabase_key:
             raise ValueError("Supabase credentials not configured")
 
-        # Initialize Supabase client
-        supabase = create_client(supabase_url, supabase_key)
+        _supabase_client = create_client(supabase_url, supabase_key)
 
-        # Encode image to JPEG
-        success, buffer = cv2.imencode('.jpg', image_array)
-        if not success:
-            raise ValueError("Failed to encode image")
+        logger.info("Supabase client created")
 
-        # Upload to Supabase Storage
-        file_path = f"deblurred/{photo_id}_deblurred.jpg"
+    return _supabase_client
 
-        response = supabase.storage.from_('photos').upload(
-            file_path,
-            buffer.tobytes(),
-            {
-                "content-type": "image/jpeg",
-                "upsert": "true"
-            }
-        )
 
-        # Get public URL
-        public_url = supabase.storage.from_('photos').get_public_url(file_path)
+def _deblur_output_format() -> str:
+    """
+    Returns the configured output format for deblurred images
+
+    DEBLUR_OUTPUT_FORMAT: 'jpeg' (default) or 'webp'
+    """
+    output_format = os.getenv('DEBLUR_OUTPUT_FORMAT', 'jpeg').lower()
+    if output_format not in ('jpeg', 'webp'):
+        raise ValueError(f"Unknown DEBLUR_OUTPUT_FORMAT: {output_format}")
+    return output_format
+
+
+def encode_deblurred_image(image_array) -> bytes:
+    """
+    Encodes a deblurred image for upload
+
+    Pure CPU work with no I/O, so it runs in the CV worker next to the
+    deblur itself: only the (much smaller) encoded bytes travel back to
+    the API process instead of the raw HxWx3 array.
+
+    Args:
+        image_array: OpenCV image array (BGR format)
+
+    Returns:
+        Encoded image bytes (JPEG or WebP, see DEBLUR_OUTPUT_FORMAT)
+    """
+    import cv2
+
+    if _deblur_output_format() == 'webp':
+        # WebP quality 90: ~25-35% smaller than JPEG at similar quality
+        success, buffer = cv2.imencode('.webp', image_array, [cv2.IMWRITE_WEBP_QUALITY, 90])
+    else:
+        # Quality 85 without optimize/progressive passes: ~2x faster encode,
+        # ~30% smaller upload than the default quality 95
+        success, buffer = cv2.imencode('.jpg', image_array, [
+            cv2.IMWRITE_JPEG_QUALITY, 85,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+        ])
+    if not success:
+        raise ValueError("Failed to encode image")
+
+    return buffer.tobytes()
+
+
+def _upload_deblurred_image_sync(photo_id: str, image_data: bytes) -> str:
+    """
+    Uploads an encoded deblurred image (blocking)
+
+    Args:
+        photo_id: Photo ID
+        image_data: Image bytes from encode_deblurred_image
+
+    Returns:
+        Public URL of the deblurred image
+    """
+    # Reuse cached Supabase client
+    supabase = _get_supabase()
+
+    if _deblur_output_format() == 'webp':
+        extension, content_type = 'webp', 'image/webp'
+    else:
+        extension, content_type = 'jpg', 'image/jpeg'
+
+    # Upload to Supabase Storage
+    file_path = f"deblurred/{photo_id}_deblurred.{extension}"
+
+    supabase.storage.from_('photos').upload(
+        file_path,
+        image_data,
+        {
+            "content-type": content_type,
+            "upsert": "true"
+        }
+    )
+
+    # Get public URL
+    return supabase.storage.from_('photos').get_public_url(file_path)
+
+
+async def upload_deblurred_image(photo_id: str, image_data: bytes) -> str:
+    """
+    Uploads deblurred image to Supabase Storage
+
+    The (synchronous) Supabase upload runs in a thread, so the event loop
+    keeps serving requests and other uploads or CV work can overlap with
+    this one.
+
+    Args:
+        photo_id: Photo ID
+        image_data: Image bytes from encode_deblurred_image
+
+    Returns:
+        Public URL of the deblurred image
+    """
+    try:
+        public_url = await asyncio.to_thread(_upload_deblurred_image_sync, photo_id, image_data)
 
         logger.info(f"✅ Deblurred image uploaded: {public_url}")
         return public_url
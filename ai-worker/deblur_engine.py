@@ -3,6 +3,7 @@ Image Deblurring Engine
 
 This module provides AI-powered image deblurring capabilities using:
 1. Real-ESRGAN - High-quality AI upscaling and deblurring
+   (PyTorch, or an exported ONNX model via ONNX Runtime / TensorRT)
 2. OpenCV Wiener Filter - Fast deblurring for motion blur
 3. Unsharp Mask - Quick sharpening enhancement
 
@@ -14,42 +15,99 @@ Why deblurring?
 
 Performance:
 - Real-ESRGAN: ~2-5 seconds per photo (high quality)
+- Real-ESRGAN ONNX + TensorRT FP16: sub-second per photo on GPU
 - Wiener Filter: ~0.5-1 second per photo (fast)
 - Unsharp Mask: ~0.1 seconds per photo (instant)
 """
 
 import logging
+import os
 import cv2
 import numpy as np
+from collections import OrderedDict
 from typing import Tuple, Optional
-from PIL import Image, ImageFilter, ImageEnhance
-import io
 
 logger = logging.getLogger(__name__)
 
+# Real-ESRGAN weights (downloaded once to a local cache, shared by all workers)
+ESRGAN_MODEL_URL = 'https://github.com/xinntao/Real-ESRGAN/releases/download/v0.2.1/RealESRGAN_x4plus.pth'
+ESRGAN_CACHE_DIR = os.path.expanduser('~/.cache/realesrgan')
+
+# Real-ESRGAN tile size bounds (tile size is the main speed/memory knob)
+ESRGAN_MIN_TILE = 256
+ESRGAN_MAX_TILE = 640
+
+# ONNX path: every photo is split into fixed-size tiles (plus TILE_PAD
+# context on each side), so the model always sees one input shape and
+# TensorRT builds exactly one engine
+ESRGAN_ONNX_TILE = ESRGAN_MIN_TILE
+ESRGAN_TILE_PAD = 10
+ESRGAN_ONNX_INPUT = 'input'
+
+# Captured CUDA graphs kept per engine (one per input shape)
+# All graphs share one memory pool, so activations cost the largest
+# shape once, not once per graph; each keeps only its static input
+ESRGAN_CUDA_GRAPH_CACHE = 8
+
+# Smoothing kernel used by PIL's ImageEnhance.Sharpness (ImageFilter.SMOOTH)
+_SHARPNESS_SMOOTH_KERNEL = np.array([[1, 1, 1],
+                                     [1, 5, 1],
+                                     [1, 1, 1]], dtype=np.float32) / 13
+
+# 1-D Gaussian (sigma=2.0) for the Wiener path's unsharp mask
+# 13 taps is the size GaussianBlur derives for sigma=2.0 on 8-bit images
+_WIENER_GAUSSIAN_KERNEL = cv2.getGaussianKernel(13, 2.0)
+
 
 class DeblurEngine:
     """
     Image deblurring engine with multiple strategies
     """
     
-    def __init__(self, method: str = 'wiener'):
+    def __init__(self, method: str = 'wiener',
+                 onnx_model_path: Optional[str] = None,
+                 trt_int8_calibration_table: Optional[str] = None,
+                 cuda_graphs: bool = False):
         """
         Initialize deblur engine
         
         Args:
-            method: 'wiener' (fast), 'unsharp' (instant), or 'esrgan' (high-quality)
+            method: 'wiener' (fast), 'unsharp' (instant), 'esrgan' (high-quality),
+                    or 'esrgan_onnx' (high-quality, TensorRT/ONNX Runtime)
+            onnx_model_path: Path to RealESRGAN_x4plus exported to ONNX with
+                             dynamic height/width (for 'esrgan_onnx')
+            trt_int8_calibration_table: Calibration table file name for INT8
+                                        TensorRT (for 'esrgan_onnx'; FP16 if None)
+            cuda_graphs: Replay untiled Real-ESRGAN forward passes from captured
+                         CUDA graphs (for 'esrgan' on CUDA)
         """
         self.method = method
         logger.info(f"DeblurEngine initialized with method={method}")
         
         # Try to load Real-ESRGAN if available
         self.upsampler = None
+        self._cuda_graphs = None
         if method == 'esrgan':
             try:
+                import torch
                 from basicsr.archs.rrdbnet_arch import RRDBNet
+                from basicsr.utils.download_util import load_file_from_url
                 from realesrgan import RealESRGANer
                 
+                # FP16 on CUDA (half the memory traffic, tensor cores)
+                # CPU stays FP32 (no half-precision conv on CPU); GTX 16xx
+                # cards produce broken FP16 output, so they stay FP32 too
+                use_half = torch.cuda.is_available() and not any(
+                    gpu in torch.cuda.get_device_name(0) for gpu in ('1650', '1660')
+                )
+
+                # Let cuDNN pick the fastest conv kernels for each tile shape
+                if torch.cuda.is_available():
+                    torch.backends.cudnn.benchmark = True
+
+                # Download weights once to a local cache (no-op if present)
+                model_path = load_file_from_url(ESRGAN_MODEL_URL, model_dir=ESRGAN_CACHE_DIR)
+                
                 # Load Real-ESRGAN model
                 model = RRDBNet(
                     num_in_ch=3,
@@ -62,17 +120,104 @@ class DeblurEngine:
                 
                 self.upsampler = RealESRGANer(
                     scale=4,
-                    model_path='https://github.com/xinntao/Real-ESRGAN/releases/download/v0.2.1/RealESRGAN_x4plus.pth',
+                    model_path=model_path,
                     model=model,
-                    tile=400,
-                    tile_pad=10,
+                    tile=400,  # Default; tuned per image in deblur_esrgan
+                    tile_pad=ESRGAN_TILE_PAD,
                     pre_pad=0,
-                    half=False
+                    half=use_half
                 )
-                logger.info("✅ Real-ESRGAN loaded successfully")
+
+                # CUDA graphs: captured per input shape on first use
+                if cuda_graphs and torch.cuda.is_available():
+                    self._cuda_graphs = OrderedDict()
+                    self._cuda_graph_pool = torch.cuda.graph_pool_handle()
+
+                logger.info(f"✅ Real-ESRGAN loaded successfully (half={use_half}, "
+                           f"cuda_graphs={self._cuda_graphs is not None})")
             except Exception as e:
                 logger.warning(f"⚠️ Real-ESRGAN not available: {e}. Falling back to Wiener filter.")
                 self.method = 'wiener'
+
+        # Try to load Real-ESRGAN ONNX model if requested
+        self.onnx_session = None
+        if method == 'esrgan_onnx':
+            try:
+                self.onnx_session = self._load_onnx_session(onnx_model_path,
+                                                            trt_int8_calibration_table)
+                logger.info(f"✅ Real-ESRGAN ONNX loaded with providers="
+                           f"{self.onnx_session.get_providers()}")
+            except Exception as e:
+                logger.warning(f"⚠️ Real-ESRGAN ONNX not available: {e}. Falling back to Wiener filter.")
+                self.method = 'wiener'
+
+    @staticmethod
+    def _load_onnx_session(onnx_model_path: Optional[str],
+                           trt_int8_calibration_table: Optional[str] = None):
+        """
+        Creates an ONNX Runtime session for the exported Real-ESRGAN model
+
+        Export once with torch.onnx.export(model, dummy_input, path,
+        input_names=['input'], output_names=['output'],
+        dynamic_axes={'input': {2: 'h', 3: 'w'}, 'output': {2: 'h', 3: 'w'}}).
+        The TensorRT optimization profile is pinned to the fixed tile shape
+        used by deblur_esrgan_onnx, so the engine is built once, not per
+        photo size.
+
+        Provider preference:
+        1. TensorRT (FP16, serialized engine cached on disk per GPU/shape)
+        2. CUDA
+        3. CPU
+
+        INT8 TensorRT (roughly half the memory traffic of FP16) needs a
+        calibration table built offline from representative photos, e.g.
+        with onnxruntime.quantization.create_calibrator(...,
+        CalibrationMethod.Entropy) and write_calibration_table(). Check
+        PSNR against the FP16 output on held-out photos before enabling it.
+        TensorRT reads the table from the engine cache directory
+        (ESRGAN_CACHE_DIR/trt-int8). Layers without INT8 kernels stay FP16.
+
+        Args:
+            onnx_model_path: Path to the .onnx file
+            trt_int8_calibration_table: Calibration table file name (enables INT8)
+
+        Returns:
+            onnxruntime.InferenceSession
+        """
+        import onnxruntime as ort
+
+        if not onnx_model_path or not os.path.exists(onnx_model_path):
+            raise ValueError(f"ONNX model not found: {onnx_model_path}")
+
+        # Separate cache for INT8 so FP16 and INT8 engines never mix
+        cache_dir = os.path.join(ESRGAN_CACHE_DIR,
+                                 'trt-int8' if trt_int8_calibration_table else 'trt')
+        os.makedirs(cache_dir, exist_ok=True)
+
+        available = ort.get_available_providers()
+        providers = []
+        if 'TensorrtExecutionProvider' in available:
+            tile_shape = (f"{ESRGAN_ONNX_INPUT}:1x3x{ESRGAN_ONNX_TILE + 2 * ESRGAN_TILE_PAD}"
+                          f"x{ESRGAN_ONNX_TILE + 2 * ESRGAN_TILE_PAD}")
+            trt_options = {
+                'trt_fp16_enable': True,
+                'trt_profile_min_shapes': tile_shape,
+                'trt_profile_opt_shapes': tile_shape,
+                'trt_profile_max_shapes': tile_shape,
+                'trt_engine_cache_enable': True,
+                'trt_engine_cache_path': cache_dir,
+            }
+            if trt_int8_calibration_table:
+                trt_options.update({
+                    'trt_int8_enable': True,
+                    'trt_int8_calibration_table_name': trt_int8_calibration_table,
+                })
+            providers.append(('TensorrtExecutionProvider', trt_options))
+        if 'CUDAExecutionProvider' in available:
+            providers.append('CUDAExecutionProvider')
+        providers.append('CPUExecutionProvider')
+
+        return ort.InferenceSession(onnx_model_path, providers=providers)
     
     def deblur_wiener(self, image_array: np.ndarray) -> np.ndarray:
         """
@@ -82,26 +227,15 @@ class DeblurEngine:
         Good for: Motion blur, camera shake
         """
         try:
-            # Convert to grayscale for processing
-            if len(image_array.shape) == 3:
-                gray = cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image_array
-            
-            # Estimate motion blur kernel
-            size = 15
-            kernel_motion_blur = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size))
-            
-            # Apply morphological operations to enhance edges
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-            enhanced = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
-            
             # Apply bilateral filter to reduce noise while preserving edges
             deblurred = cv2.bilateralFilter(image_array, 9, 75, 75)
             
             # Apply unsharp mask for additional sharpening
-            gaussian = cv2.GaussianBlur(deblurred, (0, 0), 2.0)
-            deblurred = cv2.addWeighted(deblurred, 1.5, gaussian, -0.5, 0)
+            # Precomputed separable kernel: 2x13 taps per pixel, no per-call setup
+            # Blend is written in place into the bilateral output (no extra buffer)
+            gaussian = cv2.sepFilter2D(deblurred, -1, _WIENER_GAUSSIAN_KERNEL,
+                                       _WIENER_GAUSSIAN_KERNEL)
+            cv2.addWeighted(deblurred, 1.5, gaussian, -0.5, 0, dst=deblurred)
             
             logger.info("✅ Wiener filter deblurring applied")
             return deblurred
@@ -118,15 +252,11 @@ class DeblurEngine:
         Good for: Slight blur, quick enhancement
         """
         try:
-            # Convert to PIL for unsharp mask
-            pil_image = Image.fromarray(cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB))
-            
-            # Apply unsharp mask
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            sharpened = enhancer.enhance(2.0)  # 2x sharpness
-            
-            # Convert back to OpenCV format
-            result = cv2.cvtColor(np.array(sharpened), cv2.COLOR_RGB2BGR)
+            # Apply unsharp mask directly on the BGR array (no PIL round-trip)
+            # Same math as PIL ImageEnhance.Sharpness(2.0): 2*image - smooth(image)
+            # Channel-independent, so BGR vs RGB order doesn't matter
+            smooth = cv2.filter2D(image_array, -1, _SHARPNESS_SMOOTH_KERNEL)
+            result = cv2.addWeighted(image_array, 2.0, smooth, -1.0, 0)
             
             logger.info("✅ Unsharp mask deblurring applied")
             return result
@@ -135,6 +265,28 @@ class DeblurEngine:
             logger.error(f"❌ Unsharp mask failed: {e}")
             return image_array
     
+    @staticmethod
+    def _esrgan_tile_size(height: int, width: int) -> int:
+        """
+        Picks a Real-ESRGAN tile size for an image
+
+        Small images run untiled; larger ones use the shorter side rounded
+        to a multiple of 32, clamped to [ESRGAN_MIN_TILE, ESRGAN_MAX_TILE]
+        (big enough to avoid tiling overhead, small enough to avoid OOM).
+
+        Args:
+            height: Image height
+            width: Image width
+
+        Returns:
+            Tile size (0 = no tiling)
+        """
+        if max(height, width) <= ESRGAN_MAX_TILE:
+            return 0
+
+        tile = int(round(min(height, width) / 32)) * 32
+        return min(max(ESRGAN_MIN_TILE, tile), ESRGAN_MAX_TILE)
+
     def deblur_esrgan(self, image_array: np.ndarray) -> np.ndarray:
         """
         Deblur using Real-ESRGAN AI model
@@ -147,14 +299,21 @@ class DeblurEngine:
                 logger.warning("Real-ESRGAN not available, using Wiener filter")
                 return self.deblur_wiener(image_array)
             
-            # Real-ESRGAN expects RGB
-            rgb_image = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
-            
-            # Apply Real-ESRGAN
-            output, _ = self.upsampler.enhance(rgb_image, outscale=2)
+            import torch
+
+            # Tune tile size to this image (fewer tiles = fewer kernel launches)
+            self.upsampler.tile_size = self._esrgan_tile_size(*image_array.shape[:2])
             
-            # Convert back to BGR
-            result = cv2.cvtColor(output, cv2.COLOR_RGB2BGR)
+            if self._cuda_graphs is not None and self.upsampler.tile_size == 0:
+                # Untiled: replay a captured CUDA graph (same math as enhance
+                # for the x4 model, without per-kernel launch overhead)
+                result = self._esrgan_forward_batch([image_array])[0]
+            else:
+                # Apply Real-ESRGAN
+                # RealESRGANer.enhance takes and returns BGR (it converts to RGB
+                # internally), so no cvtColor passes are needed here
+                with torch.inference_mode():
+                    result, _ = self.upsampler.enhance(image_array, outscale=2)
             
             logger.info("✅ Real-ESRGAN deblurring applied")
             return result
@@ -163,6 +322,204 @@ class DeblurEngine:
             logger.error(f"❌ Real-ESRGAN failed: {e}")
             return self.deblur_wiener(image_array)
     
+    def deblur_esrgan_onnx(self, image_array: np.ndarray) -> np.ndarray:
+        """
+        Deblur using Real-ESRGAN exported to ONNX (TensorRT / CUDA / CPU)
+        Same model as deblur_esrgan without PyTorch per-layer overhead
+        
+        Good for: Severe blur, professional results at batch scale
+        """
+        try:
+            if self.onnx_session is None:
+                logger.warning("Real-ESRGAN ONNX not available, using Wiener filter")
+                return self.deblur_wiener(image_array)
+
+            height, width = image_array.shape[:2]
+            tile, pad = ESRGAN_ONNX_TILE, ESRGAN_TILE_PAD
+            rows = -(-height // tile)
+            cols = -(-width // tile)
+
+            # Add tile_pad context on every side, and extend right/bottom to
+            # whole tiles, so every model input has the same fixed shape
+            rgb_image = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
+            padded = cv2.copyMakeBorder(
+                rgb_image, pad, pad + rows * tile - height, pad, pad + cols * tile - width,
+                cv2.BORDER_REFLECT_101
+            )
+
+            input_name = self.onnx_session.get_inputs()[0].name
+            padded_size = tile + 2 * pad
+            result = np.empty((rows * tile * 2, cols * tile * 2, 3), dtype=np.uint8)
+
+            # One tile at a time: activations stay bounded by the tile size,
+            # not the photo size
+            for y in range(0, rows * tile, tile):
+                for x in range(0, cols * tile, tile):
+                    # RGB uint8 HWC -> RGB float32 NCHW in [0, 1]
+                    patch = padded[y:y + padded_size, x:x + padded_size]
+                    input_tensor = np.ascontiguousarray(
+                        patch.transpose(2, 0, 1)[np.newaxis], dtype=np.float32
+                    ) / 255.0
+
+                    output = self.onnx_session.run(None, {input_name: input_tensor})[0]
+
+                    # RGB float32 NCHW -> RGB uint8 HWC
+                    output = np.clip(output[0].transpose(1, 2, 0) * 255.0, 0, 255).astype(np.uint8)
+
+                    # Model upscales 4x; match deblur_esrgan's outscale=2
+                    # Resized before cropping the padding, so Lanczos sees
+                    # real neighbours at tile seams
+                    output = cv2.resize(output, (padded_size * 2, padded_size * 2),
+                                        interpolation=cv2.INTER_LANCZOS4)
+                    result[y * 2:(y + tile) * 2, x * 2:(x + tile) * 2] = \
+                        output[pad * 2:(pad + tile) * 2, pad * 2:(pad + tile) * 2]
+
+            result = cv2.cvtColor(result[:height * 2, :width * 2], cv2.COLOR_RGB2BGR)
+
+            logger.info("✅ Real-ESRGAN ONNX deblurring applied")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Real-ESRGAN ONNX failed: {e}")
+            return self.deblur_wiener(image_array)
+    
+    def _esrgan_forward_batch(self, images: list) -> list:
+        """
+        Runs one batched RRDBNet forward pass on same-shape images
+
+        Bypasses RealESRGANer.enhance (one image at a time) and calls the
+        model directly on an (N, 3, H, W) tensor, so kernel launches are
+        amortized over the batch. Only used for images small enough to run
+        untiled.
+
+        Args:
+            images: List of BGR images with identical shape
+
+        Returns:
+            List of deblurred BGR images (2x, like deblur_esrgan)
+        """
+        import torch
+
+        height, width = images[0].shape[:2]
+
+        # BGR uint8 NHWC -> RGB float NCHW in [0, 1]
+        batch = np.stack([cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images])
+        tensor = torch.from_numpy(batch).to(self.upsampler.device)
+        tensor = tensor.permute(0, 3, 1, 2).float().div_(255.0)
+        if self.upsampler.half:
+            tensor = tensor.half()
+
+        with torch.inference_mode():
+            if self._cuda_graphs is not None:
+                output = self._esrgan_graph_forward(tensor)
+            else:
+                output = self.upsampler.model(tensor)
+
+            output = output.float().clamp_(0, 1).mul_(255.0).round_()
+        output = output.permute(0, 2, 3, 1).byte().cpu().numpy()
+
+        # Model upscales 4x; match deblur_esrgan's outscale=2
+        return [
+            cv2.resize(cv2.cvtColor(out, cv2.COLOR_RGB2BGR), (width * 2, height * 2),
+                       interpolation=cv2.INTER_LANCZOS4)
+            for out in output
+        ]
+
+    def _esrgan_graph_forward(self, tensor):
+        """
+        Runs the RRDBNet forward pass by replaying a captured CUDA graph
+
+        RRDBNet launches hundreds of small kernels per pass; at batch 1 the
+        launch overhead is a large share of the runtime. A graph is captured
+        once per input shape (static shapes are required) and replayed as a
+        single launch. The least recently used graph is dropped when
+        ESRGAN_CUDA_GRAPH_CACHE is exceeded.
+
+        All graphs are captured into one shared memory pool (safe because
+        replays never overlap in a deblur worker), so GPU memory is bounded
+        by the largest shape instead of growing with every captured graph.
+
+        Must be called under torch.inference_mode(). The returned tensor is
+        the graph's static output and is overwritten by the next replay of
+        any graph.
+
+        Args:
+            tensor: Preprocessed (N, 3, H, W) input on the model's device
+
+        Returns:
+            Model output tensor
+        """
+        import torch
+
+        key = tuple(tensor.shape)
+        entry = self._cuda_graphs.pop(key, None)
+        if entry is None:
+            static_input = tensor.clone()
+
+            # Warm up on a side stream first (cuDNN autotune, allocator pools)
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream):
+                for _ in range(2):
+                    self.upsampler.model(static_input)
+            torch.cuda.current_stream().wait_stream(stream)
+
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph, pool=self._cuda_graph_pool):
+                static_output = self.upsampler.model(static_input)
+            entry = (graph, static_input, static_output)
+
+            if len(self._cuda_graphs) >= ESRGAN_CUDA_GRAPH_CACHE:
+                self._cuda_graphs.popitem(last=False)
+            logger.info(f"📸 Captured Real-ESRGAN CUDA graph for shape {key}")
+
+        # Most recently used last
+        self._cuda_graphs[key] = entry
+        graph, static_input, static_output = entry
+
+        static_input.copy_(tensor)
+        graph.replay()
+        return static_output
+
+    def deblur_batch(self, images: list) -> list:
+        """
+        Deblurs several images, batching Real-ESRGAN where possible
+
+        With the 'esrgan' method, small images (untiled) that share a shape
+        go through a single batched forward pass; everything else is
+        deblurred one by one with deblur().
+
+        Args:
+            images: List of OpenCV images (BGR format)
+
+        Returns:
+            List of deblurred image arrays, in input order
+        """
+        results = [None] * len(images)
+
+        if self.method == 'esrgan' and self.upsampler is not None:
+            # Group batchable images by shape
+            groups = {}
+            for i, image in enumerate(images):
+                if max(image.shape[:2]) <= ESRGAN_MAX_TILE:
+                    groups.setdefault(image.shape, []).append(i)
+
+            for indices in groups.values():
+                if len(indices) < 2:
+                    continue
+                try:
+                    outputs = self._esrgan_forward_batch([images[i] for i in indices])
+                    for i, output in zip(indices, outputs):
+                        results[i] = output
+                    logger.info(f"✅ Real-ESRGAN batch of {len(indices)} applied")
+                except Exception as e:
+                    logger.error(f"❌ Real-ESRGAN batch failed: {e}")
+
+        return [
+            result if result is not None else self.deblur(image)
+            for image, result in zip(images, results)
+        ]
+    
     def deblur(self, image_array: np.ndarray) -> np.ndarray:
         """
         Apply deblurring based on configured method
@@ -175,6 +532,8 @@ class DeblurEngine:
         """
         if self.method == 'esrgan':
             return self.deblur_esrgan(image_array)
+        elif self.method == 'esrgan_onnx':
+            return self.deblur_esrgan_onnx(image_array)
         elif self.method == 'unsharp':
             return self.deblur_unsharp_mask(image_array)
         else:  # wiener (default)
@@ -24,15 +24,21 @@ How to run:
 import os
 import logging
 import asyncio
+import functools
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
+import httpx
+from redis.asyncio import Redis
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 # Import our blur detection module
-from blur_detector import BlurDetector
-from database import update_photo_analysis
+from blur_detector import BlurDetector, decode_image, download_image
+from database import update_photo_analysis, encode_deblurred_image
 from deblur_engine import DeblurEngine
 
 # Load environment variables
@@ -72,17 +78,275 @@ app.add_middleware(
 # - max_image_size=1280: Downsample large images (saves ~300ms per photo)
 # - Result: ~800ms saved per photo = 3 photos in ~1.2s instead of ~3s
 # - CRITICAL: Reduced from 1920 to 1280 for 40% faster processing
-blur_detector = BlurDetector(
-    threshold=float(os.getenv('BLUR_THRESHOLD', 150.0)),
-    enable_face_detection=os.getenv('ENABLE_FACE_DETECTION', 'false').lower() == 'true',
-    max_image_size=int(os.getenv('MAX_IMAGE_SIZE', 1280))  # CRITICAL: Reduced for speed
-)
+def create_blur_detector() -> BlurDetector:
+    """Creates a BlurDetector from environment configuration"""
+    return BlurDetector(
+        threshold=float(os.getenv('BLUR_THRESHOLD', 150.0)),
+        enable_face_detection=os.getenv('ENABLE_FACE_DETECTION', 'false').lower() == 'true',
+        max_image_size=int(os.getenv('MAX_IMAGE_SIZE', 1280)),  # CRITICAL: Reduced for speed
+        use_opencl=os.getenv('BLUR_USE_OPENCL', 'false').lower() == 'true'
+    )
+
 
 # Initialize deblur engine
-# Methods: 'wiener' (fast), 'unsharp' (instant), 'esrgan' (high-quality)
-deblur_engine = DeblurEngine(
-    method=os.getenv('DEBLUR_METHOD', 'wiener')
-)
+# Methods: 'wiener' (fast), 'unsharp' (instant), 'esrgan' (high-quality),
+#          'esrgan_onnx' (high-quality, TensorRT/ONNX Runtime)
+DEBLUR_METHOD = os.getenv('DEBLUR_METHOD', 'wiener')
+
+
+def create_deblur_engine() -> DeblurEngine:
+    """Creates a DeblurEngine from environment configuration"""
+    return DeblurEngine(
+        method=DEBLUR_METHOD,
+        onnx_model_path=os.getenv('ESRGAN_ONNX_PATH'),
+        trt_int8_calibration_table=os.getenv('ESRGAN_TRT_INT8_CALIBRATION_TABLE'),
+        cuda_graphs=os.getenv('ESRGAN_CUDA_GRAPHS', 'false').lower() == 'true'
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_blur_detector() -> BlurDetector:
+    """
+    Returns this process's BlurDetector, created on first use
+    """
+    return create_blur_detector()
+
+
+@functools.lru_cache(maxsize=1)
+def get_deblur_engine() -> DeblurEngine:
+    """
+    Returns this process's DeblurEngine, created on first use
+
+    Only called in deblur_executor workers (DEBLUR_WORKERS processes,
+    default 1), so the engine (Real-ESRGAN weights, CUDA context, cuDNN
+    autotune) is loaded once per deblur worker, never in the API process
+    or the analysis pool.
+    """
+    if DEBLUR_METHOD == 'esrgan':
+        # Split the CPU cores between deblur workers: N workers x all-core
+        # torch thread pools would oversubscribe the CPU
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // DEBLUR_WORKERS))
+
+    return create_deblur_engine()
+
+
+# Shared async HTTP client for image downloads
+# Created on startup, closed on shutdown. Downloads don't block the event loop,
+# so concurrent /analyze and /deblur requests actually overlap.
+http_client: Optional[httpx.AsyncClient] = None
+
+# Process pool for CPU-heavy CV work (decode, blur detection)
+# Bypasses the GIL so concurrent requests scale with CPU cores.
+# Created on startup, shut down on shutdown.
+cv_executor: Optional[ProcessPoolExecutor] = None
+
+# Separate small pool for deblurring
+# Each worker holds its own deblur engine; with Real-ESRGAN on CUDA that is
+# a CUDA context plus model copy per process, so one worker per GPU
+# (the default) avoids running the GPU out of memory.
+DEBLUR_WORKERS = int(os.getenv('DEBLUR_WORKERS', 1))
+deblur_executor: Optional[ProcessPoolExecutor] = None
+
+# Redis client for the /analyze and /deblur result caches
+# Retries, rescans and shared photos return stored results instead of
+# re-running CV (2-5 s per deblur with Real-ESRGAN).
+# Opt-in (ENABLE_RESULT_CACHE=true): created on startup, None otherwise.
+redis_client: Optional[Redis] = None
+ENABLE_RESULT_CACHE = os.getenv('ENABLE_RESULT_CACHE', 'false').lower() == 'true'
+ANALYZE_CACHE_TTL = int(os.getenv('ANALYZE_CACHE_TTL', 24 * 3600))
+DEBLUR_CACHE_TTL = int(os.getenv('DEBLUR_CACHE_TTL', 7 * 24 * 3600))
+
+# Photos scoring this far above the blur threshold are already sharp:
+# /deblur returns the original image instead of deblurring it
+SHARP_SKIP_FACTOR = 1.2
+
+# ============================================
+# CV Work (runs in process pool workers)
+# ============================================
+
+# Each worker process gets its own blur detector and deblur engine through
+# get_blur_detector() / get_deblur_engine(), created once per process on
+# first use (not per request)
+
+def _analyze_image_bytes(data: bytes) -> dict:
+    """
+    Decodes and analyzes image bytes (pure CV, runs in a worker process)
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        Analysis results from BlurDetector.analyze_from_bytes
+    """
+    return get_blur_detector().analyze_from_bytes(data)
+
+
+def _deblur_image_bytes(data: bytes) -> tuple:
+    """
+    Decodes, scores and deblurs image bytes (pure CV, runs in a worker process)
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        Tuple of (blur_score_before, blur_score_after, encoded deblurred image).
+        The image is None if the photo is already sharp and was not deblurred.
+    """
+    result = _deblur_batch_bytes([data])[0]
+
+    if result is None:
+        raise ValueError("Failed to decode image")
+
+    return result
+
+
+def _deblur_batch_bytes(datas: list) -> list:
+    """
+    Decodes, scores and deblurs several images (pure CV, runs in a worker process)
+
+    Images are deblurred together with DeblurEngine.deblur_batch so that
+    Real-ESRGAN can run one batched forward pass for same-size photos.
+
+    The before score is computed exactly like /analyze computes it (reduced
+    decode + downsample to max_image_size), so it matches the stored score
+    and the already-sharp check uses the thresholds as tuned. Photos scoring
+    at least SHARP_SKIP_FACTOR x threshold are not deblurred.
+
+    Args:
+        datas: List of encoded image bytes
+
+    Returns:
+        List of (blur_score_before, blur_score_after, encoded deblurred image),
+        or None for images that could not be decoded. The image is None for
+        photos that are already sharp.
+    """
+    blur_detector = get_blur_detector()
+    results = [None] * len(datas)
+    to_deblur = []
+
+    for i, data in enumerate(datas):
+        # Get blur score before deblurring
+        preview = decode_image(data, blur_detector.max_image_size)
+        if preview is None:
+            continue
+        blur_score_before = blur_detector.detect_blur_from_array(preview)['blur_score']
+
+        # Already sharp - nothing to rescue
+        if blur_score_before >= blur_detector.threshold * SHARP_SKIP_FACTOR:
+            results[i] = (blur_score_before, blur_score_before, None)
+            continue
+
+        # Full resolution on purpose: the deblurred output is what the user keeps
+        image = decode_image(data)
+        if image is not None:
+            to_deblur.append((i, image, blur_score_before))
+
+    deblurred_images = get_deblur_engine().deblur_batch([image for _, image, _ in to_deblur])
+
+    for (i, _, blur_score_before), deblurred_image in zip(to_deblur, deblurred_images):
+        results[i] = (
+            blur_score_before,
+            blur_detector.detect_blur_from_array(deblurred_image)['blur_score'],
+            # Encode here so only the compressed bytes go back to the API process
+            encode_deblurred_image(deblurred_image),
+        )
+    return results
+
+
+async def _cache_get(key: str) -> Optional[dict]:
+    """
+    Looks up a cached result
+
+    Cache errors are logged and treated as a miss (the cache is an
+    optimization, never a reason to fail a request).
+    """
+    if redis_client is None:
+        return None
+    try:
+        cached = await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache lookup failed for {key}: {str(e)}")
+        return None
+    return json.loads(cached) if cached else None
+
+
+async def _cache_set(key: str, result: dict, ttl: int) -> None:
+    """Stores a result in the cache (errors are logged and ignored)"""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(key, json.dumps(result), ex=ttl)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache store failed for {key}: {str(e)}")
+
+
+async def _analyze_cache_key(image_url: str) -> Optional[str]:
+    """
+    Builds the /analyze cache key for an image from a HEAD request
+
+    Keyed on the storage host and path plus the ETag (or Last-Modified
+    when there is no ETag), so signed URLs with different query strings
+    still hit, while weak or mtime-based ETags cannot collide across
+    different photos. The detector configuration (threshold, max image
+    size, face detection, exposure score) is part of the key because the
+    results depend on it.
+
+    Args:
+        image_url: URL of the image
+
+    Returns:
+        Cache key, or None if the image has no validator (or HEAD failed)
+    """
+    if redis_client is None:
+        return None
+    try:
+        response = await http_client.head(image_url)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"⚠️ HEAD failed for {image_url}: {str(e)}")
+        return None
+
+    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    if not validator:
+        return None
+
+    detector = get_blur_detector()
+    config = (f"{detector.threshold}|{detector.max_image_size}|"
+              f"{detector.enable_face_detection}|{detector.enable_exposure_score}")
+    url = httpx.URL(image_url)
+    key = f"{url.host}{url.path}|{validator}|{config}"
+    return f"analyze:{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"
+
+
+async def run_cv(fn, *args):
+    """
+    Runs a CV function in the process pool without blocking the event loop
+
+    Args:
+        fn: Top-level (picklable) CV function
+        *args: Arguments for fn
+
+    Returns:
+        Result of fn(*args)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cv_executor, fn, *args)
+
+
+async def run_deblur(fn, *args):
+    """
+    Runs a deblur function in the deblur pool without blocking the event loop
+
+    Args:
+        fn: Top-level (picklable) deblur function
+        *args: Arguments for fn
+
+    Returns:
+        Result of fn(*args)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(deblur_executor, fn, *args)
 
 # ============================================
 # Request/Response Models
@@ -212,34 +476,21 @@ async def analyze_photo(request: AnalyzePhotoRequest):
     """
     try:
         logger.info(f"Analyzing photo {request.photo_id} from {request.image_url}")
-        
-        # Analyze the photo
-        result = blur_detector.analyze_from_url(request.image_url)
-        
-        # Update database with results
-        await update_photo_analysis(
-            photo_id=request.photo_id,
-            is_blurry=result['is_blurry'],
-            blur_score=result['blur_score'],
-            quality_score=result['quality_score'],
-            has_faces=result.get('has_faces', False),
-            face_count=result.get('face_count', 0),
-            exposure_score=result.get('exposure_score', None)
-        )
-        
-        logger.info(f"Photo {request.photo_id} analyzed successfully: "
-                   f"blur_score={result['blur_score']:.2f}, "
-                   f"is_blurry={result['is_blurry']}")
-        
-        # Return response
-        return AnalyzePhotoResponse(
-            photo_id=request.photo_id,
-            is_blurry=result['is_blurry'],
-            blur_score=result['blur_score'],
-            quality_score=result['quality_score'],
-            confidence=result['confidence'],
-            method=result['method']
-        )
+
+        # Unchanged image (same ETag) = same result: skip download and CV
+        # The database row is still written for this photo
+        cache_key = await _analyze_cache_key(request.image_url)
+        if cache_key is not None:
+            cached = await _cache_get(cache_key)
+            if cached is not None:
+                logger.info(f"⚡ Analysis cache hit for photo {request.photo_id}")
+                return await _store_analysis(request, cached)
+
+        # Download the photo (async - doesn't block the event loop)
+        image_bytes = await download_image(http_client, request.image_url,
+                                           get_blur_detector().max_bytes)
+
+        return await _analyze_and_store(request, image_bytes, cache_key)
         
     except Exception as e:
         logger.error(f"Error analyzing photo {request.photo_id}: {str(e)}")
@@ -249,6 +500,130 @@ async def analyze_photo(request: AnalyzePhotoRequest):
         )
 
 
+async def _analyze_and_store(request: AnalyzePhotoRequest, image_bytes: bytes,
+                             cache_key: Optional[str] = None) -> AnalyzePhotoResponse:
+    """
+    Analyzes downloaded photo bytes and updates the database
+
+    Args:
+        request: AnalyzePhotoRequest with photo_id, image_url, project_id
+        image_bytes: Downloaded image bytes
+        cache_key: Result cache key to store the analysis under (optional)
+
+    Returns:
+        AnalyzePhotoResponse with analysis results
+    """
+    # Analyze the photo (process pool - doesn't hold the GIL)
+    result = await run_cv(_analyze_image_bytes, image_bytes)
+
+    if cache_key is not None:
+        await _cache_set(cache_key, result, ANALYZE_CACHE_TTL)
+
+    return await _store_analysis(request, result)
+
+
+async def _store_analysis(request: AnalyzePhotoRequest, result: dict) -> AnalyzePhotoResponse:
+    """
+    Writes analysis results to the database and builds the response
+
+    Args:
+        request: AnalyzePhotoRequest with photo_id, image_url, project_id
+        result: Analysis results from BlurDetector.analyze_from_bytes
+
+    Returns:
+        AnalyzePhotoResponse with analysis results
+    """
+    # Update database with results
+    await update_photo_analysis(
+        photo_id=request.photo_id,
+        is_blurry=result['is_blurry'],
+        blur_score=result['blur_score'],
+        quality_score=result['quality_score'],
+        has_faces=result.get('has_faces', False),
+        face_count=result.get('face_count', 0),
+        exposure_score=result.get('exposure_score', None)
+    )
+    
+    logger.info(f"Photo {request.photo_id} analyzed successfully: "
+               f"blur_score={result['blur_score']:.2f}, "
+               f"is_blurry={result['is_blurry']}")
+    
+    # Return response
+    return AnalyzePhotoResponse(
+        photo_id=request.photo_id,
+        is_blurry=result['is_blurry'],
+        blur_score=result['blur_score'],
+        quality_score=result['quality_score'],
+        confidence=result['confidence'],
+        method=result['method']
+    )
+
+
+def _deblur_cache_key(image_bytes: bytes) -> str:
+    """
+    Builds the /deblur cache key for downloaded image bytes
+
+    Same image content + same engine = same result (common on retries).
+    BLAKE2 is in hashlib and hashes at >1 GB/s, negligible next to CV.
+    """
+    content_hash = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    return f"deblur:{DEBLUR_METHOD}:{content_hash}"
+
+
+async def _finish_deblur(request: DeblurPhotoRequest, cv_result: tuple,
+                         cache_key: str) -> DeblurPhotoResponse:
+    """
+    Uploads a deblurred photo, caches the result and builds the response
+
+    Args:
+        request: DeblurPhotoRequest the photo came from
+        cv_result: (blur_score_before, blur_score_after, encoded image or None)
+        cache_key: Key from _deblur_cache_key
+
+    Returns:
+        DeblurPhotoResponse (the original URL if the photo was already sharp)
+
+    Raises:
+        Exception: If the upload fails
+    """
+    from database import upload_deblurred_image
+
+    blur_score_before, blur_score_after, deblurred_data = cv_result
+    logger.info(f"📊 Blur score before: {blur_score_before:.2f}")
+
+    if deblurred_data is None:
+        logger.info(f"✅ Photo {request.photo_id} is already sharp, skipping deblur")
+        return DeblurPhotoResponse(
+            photo_id=request.photo_id,
+            success=True,
+            deblurred_url=request.image_url,
+            blur_score_before=blur_score_before,
+            blur_score_after=blur_score_after,
+            improvement=0.0
+        )
+
+    logger.info(f"📊 Blur score after: {blur_score_after:.2f}")
+
+    # Calculate improvement
+    improvement = ((blur_score_after - blur_score_before) / max(blur_score_before, 1)) * 100
+    logger.info(f"📈 Improvement: {improvement:.1f}%")
+
+    # Save deblurred image to Supabase Storage
+    deblurred_url = await upload_deblurred_image(request.photo_id, deblurred_data)
+
+    logger.info(f"✅ Deblurring successful: {deblurred_url}")
+
+    result = {
+        'deblurred_url': deblurred_url,
+        'blur_score_before': blur_score_before,
+        'blur_score_after': blur_score_after,
+        'improvement': improvement,
+    }
+    await _cache_set(cache_key, result, DEBLUR_CACHE_TTL)
+
+    return DeblurPhotoResponse(photo_id=request.photo_id, success=True, **result)
+
+
 @app.post("/deblur")
 async def deblur_photo(request: DeblurPhotoRequest) -> DeblurPhotoResponse:
     """
@@ -270,49 +645,22 @@ async def deblur_photo(request: DeblurPhotoRequest) -> DeblurPhotoResponse:
     try:
         logger.info(f"🔧 Deblurring photo {request.photo_id} using {request.method} method")
 
-        # Download the image
-        import requests
-        response = requests.get(request.image_url, timeout=30)
-        response.raise_for_status()
-
-        # Load image
-        import cv2
-        import numpy as np
-        nparr = np.frombuffer(response.content, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if image is None:
-            raise ValueError("Failed to decode image")
-
-        # Get blur score before deblurring
-        blur_score_before = blur_detector.detect_blur(image)
-        logger.info(f"📊 Blur score before: {blur_score_before:.2f}")
-
-        # Apply deblurring
-        deblurred_image = deblur_engine.deblur(image)
+        # Download the image (async - doesn't block the event loop)
+        image_bytes = await download_image(http_client, request.image_url,
+                                           get_blur_detector().max_bytes)
 
-        # Get blur score after deblurring
-        blur_score_after = blur_detector.detect_blur(deblurred_image)
-        logger.info(f"📊 Blur score after: {blur_score_after:.2f}")
+        # Same image content + same engine = same result (common on retries)
+        cache_key = _deblur_cache_key(image_bytes)
+        cached = await _cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Deblur cache hit: {cached['deblurred_url']}")
+            return DeblurPhotoResponse(photo_id=request.photo_id, success=True, **cached)
 
-        # Calculate improvement
-        improvement = ((blur_score_after - blur_score_before) / max(blur_score_before, 1)) * 100
-        logger.info(f"📈 Improvement: {improvement:.1f}%")
+        # Decode, score and deblur (process pool - doesn't hold the GIL)
+        cv_result = await run_deblur(_deblur_image_bytes, image_bytes)
 
-        # Save deblurred image to Supabase Storage
-        from database import upload_deblurred_image
-        deblurred_url = await upload_deblurred_image(request.photo_id, deblurred_image)
-
-        logger.info(f"✅ Deblurring successful: {deblurred_url}")
-
-        return DeblurPhotoResponse(
-            photo_id=request.photo_id,
-            success=True,
-            deblurred_url=deblurred_url,
-            blur_score_before=blur_score_before,
-            blur_score_after=blur_score_after,
-            improvement=improvement
-        )
+        # Upload and cache (or return the original if already sharp)
+        return await _finish_deblur(request, cv_result, cache_key)
 
     except Exception as e:
         logger.error(f"❌ Deblurring failed: {str(e)}")
@@ -323,6 +671,126 @@ async def deblur_photo(request: DeblurPhotoRequest) -> DeblurPhotoResponse:
         )
 
 
+@app.post("/batch-deblur")
+async def batch_deblur_photos(photos: list[DeblurPhotoRequest]) -> list[DeblurPhotoResponse]:
+    """
+    Deblurs multiple photos in one batch
+
+    PERFORMANCE OPTIMIZATION:
+    - Fixed pool of download workers feeding a bounded queue (same design
+      as /batch-analyze): downloads run at most one chunk ahead of
+      deblurring, so connections and buffered images stay bounded
+    - Deblurs up to DEBLUR_BATCH_SIZE ready photos per worker call, so
+      Real-ESRGAN runs one batched forward pass for same-size photos
+      (GPU is far more efficient at batch > 1)
+    - Uploads of a finished chunk run in the background while the next
+      chunk is deblurred (upload latency is off the critical path)
+    - Same result cache and already-sharp skip as /deblur
+
+    Args:
+        photos: List of DeblurPhotoRequest objects
+
+    Returns:
+        List of DeblurPhotoResponse (same order as the request)
+    """
+    logger.info(f"🔧 Starting batch deblur of {len(photos)} photos")
+
+    batch_size = int(os.getenv('DEBLUR_BATCH_SIZE', 8))
+
+    # Pending photos (index keeps responses in request order)
+    pending: asyncio.Queue = asyncio.Queue()
+    for index, photo in enumerate(photos):
+        pending.put_nowait((index, photo))
+
+    # Downloaded photos waiting to be deblurred
+    # Bounded: downloads run at most one chunk ahead of deblurring
+    downloaded: asyncio.Queue = asyncio.Queue(maxsize=batch_size)
+
+    responses = [None] * len(photos)
+    upload_tasks = {}
+
+    async def finish(photo: DeblurPhotoRequest, cv_result, cache_key: str) -> DeblurPhotoResponse:
+        if cv_result is None:
+            logger.error(f"❌ Deblurring failed for photo {photo.photo_id}")
+            return DeblurPhotoResponse(photo_id=photo.photo_id, success=False)
+        try:
+            return await _finish_deblur(photo, cv_result, cache_key)
+        except Exception as e:
+            logger.error(f"❌ Upload failed for photo {photo.photo_id}: {str(e)}")
+            return DeblurPhotoResponse(photo_id=photo.photo_id, success=False)
+
+    async def download_worker():
+        """Downloads pending photos until none are left"""
+        while True:
+            try:
+                index, photo = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                image_bytes = await download_image(http_client, photo.image_url,
+                                                   get_blur_detector().max_bytes)
+            except Exception as e:
+                logger.error(f"❌ Download failed for photo {photo.photo_id}: {str(e)}")
+                responses[index] = DeblurPhotoResponse(photo_id=photo.photo_id, success=False)
+                continue
+
+            cache_key = _deblur_cache_key(image_bytes)
+            cached = await _cache_get(cache_key)
+            if cached is not None:
+                logger.info(f"⚡ Deblur cache hit: {cached['deblurred_url']}")
+                responses[index] = DeblurPhotoResponse(photo_id=photo.photo_id,
+                                                       success=True, **cached)
+            else:
+                await downloaded.put((index, image_bytes, cache_key))
+
+    async def deblur_worker():
+        """Deblurs downloaded photos in chunks until it receives None"""
+        finished = False
+        while not finished:
+            item = await downloaded.get()
+            if item is None:
+                return
+
+            # Take every photo that is already downloaded (up to batch_size)
+            chunk = [item]
+            while len(chunk) < batch_size and not downloaded.empty():
+                item = downloaded.get_nowait()
+                if item is None:
+                    finished = True
+                    break
+                chunk.append(item)
+
+            try:
+                batch_results = await run_deblur(_deblur_batch_bytes,
+                                                 [image_bytes for _, image_bytes, _ in chunk])
+            except Exception as e:
+                logger.error(f"❌ Batch deblurring failed: {str(e)}")
+                batch_results = [None] * len(chunk)
+
+            # Start this chunk's uploads before deblurring the next one
+            for (index, _, cache_key), cv_result in zip(chunk, batch_results):
+                upload_tasks[index] = asyncio.create_task(
+                    finish(photos[index], cv_result, cache_key)
+                )
+
+    downloaders = [asyncio.create_task(download_worker()) for _ in range(batch_size)]
+    deblurrer = asyncio.create_task(deblur_worker())
+
+    # Wait for all downloads, then tell the deblur worker to finish
+    await asyncio.gather(*downloaders)
+    await downloaded.put(None)
+    await deblurrer
+
+    # Wait for all pending uploads
+    for index, task in upload_tasks.items():
+        responses[index] = await task
+
+    successful = sum(1 for r in responses if r.success)
+    logger.info(f"✅ Batch deblur complete: {successful}/{len(photos)} successful")
+
+    return responses
+
+
 @app.post("/batch-analyze")
 async def batch_analyze_photos(photos: list[AnalyzePhotoRequest]):
     """
@@ -330,10 +798,17 @@ async def batch_analyze_photos(photos: list[AnalyzePhotoRequest]):
 
     PERFORMANCE OPTIMIZATION:
     - Processes photos in parallel (not sequentially)
-    - Uses asyncio.gather() for concurrent execution
+    - Fixed pool of long-lived download and analysis workers fed by queues
+      (O(max_concurrent) tasks instead of one task per photo)
     - Limits concurrency to prevent resource exhaustion
+    - Prefetches downloads ahead of CV work so network latency hides
+      behind analysis of the previous photos
     - Example: 100 photos in ~30 seconds (instead of ~100 seconds)
 
+    Unlike /analyze, the result cache is not used: batches are usually
+    freshly uploaded photos, so a HEAD request per photo would mostly add
+    a round-trip without a hit.
+
     Args:
         photos: List of AnalyzePhotoRequest objects
 
@@ -346,33 +821,65 @@ async def batch_analyze_photos(photos: list[AnalyzePhotoRequest]):
     # Adjust based on available CPU/memory
     max_concurrent = int(os.getenv('MAX_CONCURRENT_ANALYSIS', 4))
 
-    # Create semaphore to limit concurrent tasks
-    semaphore = asyncio.Semaphore(max_concurrent)
+    # Pending photos (index keeps results in request order)
+    pending: asyncio.Queue = asyncio.Queue()
+    for index, photo in enumerate(photos):
+        pending.put_nowait((index, photo))
+
+    # Downloaded photos waiting for analysis
+    # Bounded: downloads run at most max_concurrent photos ahead of CV work
+    downloaded: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent)
+
+    results = [None] * len(photos)
+
+    def failure(photo_request: AnalyzePhotoRequest, e: Exception) -> dict:
+        logger.error(f"❌ Error analyzing photo {photo_request.photo_id}: {str(e)}")
+        return {
+            "photo_id": photo_request.photo_id,
+            "success": False,
+            "error": str(e)
+        }
 
-    async def analyze_with_semaphore(photo_request: AnalyzePhotoRequest):
-        """Wrapper to limit concurrent analysis"""
-        async with semaphore:
+    async def download_worker():
+        """Downloads pending photos until none are left"""
+        while True:
+            try:
+                index, photo_request = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                image_bytes = await download_image(http_client, photo_request.image_url,
+                                                   get_blur_detector().max_bytes)
+                await downloaded.put((index, photo_request, image_bytes))
+            except Exception as e:
+                results[index] = failure(photo_request, e)
+
+    async def analysis_worker():
+        """Analyzes downloaded photos until it receives None"""
+        while True:
+            item = await downloaded.get()
+            if item is None:
+                return
+            index, photo_request, image_bytes = item
             try:
                 logger.info(f"📸 Analyzing photo {photo_request.photo_id}")
-                result = await analyze_photo(photo_request)
-                return {
+                result = await _analyze_and_store(photo_request, image_bytes)
+                results[index] = {
                     "photo_id": photo_request.photo_id,
                     "success": True,
                     "result": result
                 }
             except Exception as e:
-                logger.error(f"❌ Error analyzing photo {photo_request.photo_id}: {str(e)}")
-                return {
-                    "photo_id": photo_request.photo_id,
-                    "success": False,
-                    "error": str(e)
-                }
+                results[index] = failure(photo_request, e)
 
-    # Run all analyses in parallel with concurrency limit
-    results = await asyncio.gather(
-        *[analyze_with_semaphore(photo) for photo in photos],
-        return_exceptions=False
-    )
+    downloaders = [asyncio.create_task(download_worker()) for _ in range(max_concurrent)]
+    analyzers = [asyncio.create_task(analysis_worker()) for _ in range(max_concurrent)]
+
+    # Wait for all downloads, then tell analysis workers to finish
+    await asyncio.gather(*downloaders)
+    for _ in analyzers:
+        await downloaded.put(None)
+    await asyncio.gather(*analyzers)
 
     successful = sum(1 for r in results if r['success'])
     failed = sum(1 for r in results if not r['success'])
@@ -398,8 +905,42 @@ async def startup_event():
     
     Initialize connections, load models, etc.
     """
+    global http_client, cv_executor, deblur_executor, redis_client
+
     logger.info("AI Worker service starting up...")
-    logger.info(f"Blur threshold: {blur_detector.threshold}")
+    # Pooled keep-alive connections + HTTP/2 multiplexing: concurrent image
+    # fetches from the same bucket share connections instead of paying a
+    # TCP+TLS handshake per photo
+    # follow_redirects: storage URLs may answer 3xx
+    http_client = httpx.AsyncClient(
+        timeout=30,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+
+    if ENABLE_RESULT_CACHE:
+        # Short timeouts: an unreachable Redis must cost a request at most
+        # a second (treated as a cache miss), not the OS connect timeout
+        redis_client = Redis.from_url(
+            os.getenv('REDIS_URL', 'redis://localhost:6379'),
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1
+        )
+        logger.info("Result cache enabled")
+
+    cv_workers = int(os.getenv('CV_WORKERS', os.cpu_count() or 1))
+    cv_executor = ProcessPoolExecutor(
+        max_workers=cv_workers
+    )
+    logger.info(f"CV process pool started with {cv_workers} workers")
+
+    deblur_executor = ProcessPoolExecutor(
+        max_workers=DEBLUR_WORKERS
+    )
+    logger.info(f"Deblur process pool started with {DEBLUR_WORKERS} workers")
+    logger.info(f"Blur threshold: {get_blur_detector().threshold}")
     logger.info("AI Worker service ready!")
 
 
@@ -412,6 +953,18 @@ async def shutdown_event():
     """
     logger.info("AI Worker service shutting down...")
 
+    if http_client is not None:
+        await http_client.aclose()
+
+    if redis_client is not None:
+        await redis_client.aclose()
+
+    if cv_executor is not None:
+        cv_executor.shutdown(wait=False, cancel_futures=True)
+
+    if deblur_executor is not None:
+        deblur_executor.shutdown(wait=False, cancel_futures=True)
+
 
 # ============================================
 # Run the application
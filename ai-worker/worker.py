@@ -6,9 +6,10 @@ This script processes jobs from the Bull queue (Redis).
 How it works:
 1. Connects to Redis
 2. Listens for jobs in 'ai-analysis' queue
-3. Processes each job (calls blur detection)
-4. Updates job status
-5. Repeats
+3. Prefetches the next jobs' images while the current one is analyzed
+4. Processes each job (calls blur detection)
+5. Updates job status
+6. Repeats
 
 Why separate worker?
 - Can run multiple workers for parallel processing
@@ -22,14 +23,16 @@ How to run:
 import os
 import json
 import time
+import socket
 import logging
 import asyncio
-import requests
+from typing import Optional
+import httpx
 from redis import Redis
 from dotenv import load_dotenv
 
-from blur_detector import BlurDetector
-from database import update_photo_analysis
+from blur_detector import BlurDetector, download_image
+from database import update_photo_analysis, update_photo_analysis_bulk
 
 # Load environment variables
 load_dotenv()
@@ -52,11 +55,283 @@ blur_detector = BlurDetector(
 
 # Queue name
 QUEUE_NAME = 'bull:ai-analysis'
+WAIT_KEY = f'{QUEUE_NAME}:wait'
 
+# Jobs this worker has popped but not finished (reliable queue pattern)
+# Popping moves a job here atomically; it is removed once processed and
+# pushed back to the wait list on shutdown, or by any worker once this
+# worker's lease has expired after a crash. Defaults to hostname:pid so
+# workers on the same host never share a processing list.
+WORKER_ID = os.getenv('WORKER_ID', f'{socket.gethostname()}:{os.getpid()}')
+PROCESSING_KEY = f'{QUEUE_NAME}:processing:{WORKER_ID}'
 
-async def process_job(job_data: dict) -> dict:
+# Liveness lease for WORKER_ID, refreshed while the worker runs. Taken with
+# SET NX, so a second worker started with the same id refuses to run.
+LEASE_KEY = f'{QUEUE_NAME}:worker:{WORKER_ID}'
+WORKER_LEASE_TTL = int(os.getenv('WORKER_LEASE_TTL', 30))
+
+# Number of downloaded jobs kept ready ahead of the ones being analyzed
+PREFETCH_SIZE = int(os.getenv('PREFETCH_SIZE', 8))
+
+# Maximum number of jobs popped from Redis (and processed) per round-trip
+FETCH_BATCH_SIZE = int(os.getenv('FETCH_BATCH_SIZE', 8))
+
+# Moves up to ARGV[1] jobs from the wait list to the processing list in one
+# round-trip (works on any Redis version, unlike RPOP/LMOVE with a count
+# argument which need Redis >= 6.2)
+POP_BATCH_SCRIPT = """
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('RPOPLPUSH', KEYS[1], KEYS[2])
+    if not item then
+        break
+    end
+    items[#items + 1] = item
+end
+return items
+"""
+
+# Moves every unfinished job from the processing list back to the wait
+# list, to the end that is popped next
+REQUEUE_SCRIPT = """
+local count = 0
+while true do
+    local item = redis.call('LPOP', KEYS[1])
+    if not item then
+        break
+    end
+    redis.call('RPUSH', KEYS[2], item)
+    count = count + 1
+end
+return count
+"""
+
+# Same as REQUEUE_SCRIPT, but only if the owning worker's lease (KEYS[3])
+# has expired, checked atomically with the move
+REQUEUE_ORPHANED_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return 0
+end
+local count = 0
+while true do
+    local item = redis.call('LPOP', KEYS[1])
+    if not item then
+        break
+    end
+    redis.call('RPUSH', KEYS[2], item)
+    count = count + 1
+end
+return count
+"""
+
+
+class PrefetchQueue:
+    """
+    Pops jobs from Redis and downloads their images ahead of processing
+
+    A background task keeps up to `maxsize` (job, image bytes) pairs ready,
+    so network latency overlaps with CV work on the current jobs instead of
+    adding to it. Jobs are popped up to `batch_size` at a time in a single
+    Redis round-trip.
+
+    Popped jobs sit in PROCESSING_KEY until the consumer calls finish(), so
+    prefetched or in-flight jobs are never lost: stop() pushes them back to
+    the wait list, and a lease task periodically recovers the processing
+    lists of workers whose lease has expired (crashed workers).
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient, maxsize: int = 2,
+                 batch_size: int = 8):
+        """
+        Initialize prefetch queue
+
+        Args:
+            http_client: Shared async HTTP client for downloads
+            maxsize: Number of downloaded jobs to keep ready
+            batch_size: Maximum jobs popped per Redis round-trip
+        """
+        self.http_client = http_client
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._pop_batch = redis_client.register_script(POP_BATCH_SCRIPT)
+        self._requeue = redis_client.register_script(REQUEUE_SCRIPT)
+        self._requeue_orphaned = redis_client.register_script(REQUEUE_ORPHANED_SCRIPT)
+        self._task: Optional[asyncio.Task] = None
+        self._lease_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Takes the worker lease, recovers unfinished jobs, then starts prefetching
+
+        Raises:
+            RuntimeError: If another live worker is using the same WORKER_ID
+        """
+        acquired = await asyncio.to_thread(
+            redis_client.set, LEASE_KEY, WORKER_ID, nx=True, ex=WORKER_LEASE_TTL
+        )
+        if not acquired:
+            raise RuntimeError(
+                f"Worker id {WORKER_ID} is already in use; set a unique WORKER_ID"
+            )
+
+        await self._requeue_unfinished()
+        await self._requeue_orphaned_jobs()
+        self._lease_task = asyncio.create_task(self._keep_lease())
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the background tasks, requeues unfinished jobs, releases the lease"""
+        for task in (self._task, self._lease_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self._requeue_unfinished()
+        await asyncio.to_thread(redis_client.delete, LEASE_KEY)
+
+    async def finish(self, job_jsons: list, completed: list,
+                     retry: Optional[list] = None) -> None:
+        """
+        Removes processed jobs from the processing list
+
+        Args:
+            job_jsons: All processed jobs (succeeded or failed)
+            completed: Jobs that succeeded (pushed to the completed list)
+            retry: Jobs whose results could not be saved (pushed back to
+                   the end of the wait list)
+        """
+        # One pipelined round-trip for the whole batch
+        pipe = redis_client.pipeline(transaction=False)
+        for job_json in job_jsons:
+            pipe.lrem(PROCESSING_KEY, 1, job_json)
+        for job_json in completed:
+            pipe.lpush(f'{QUEUE_NAME}:completed', job_json)
+        for job_json in retry or []:
+            pipe.lpush(WAIT_KEY, job_json)
+        await asyncio.to_thread(pipe.execute)
+
+    async def _requeue_unfinished(self) -> None:
+        """Pushes every job still in the processing list back to the wait list"""
+        count = await asyncio.to_thread(
+            self._requeue, keys=[PROCESSING_KEY, WAIT_KEY]
+        )
+        if count:
+            logger.info(f"Requeued {count} unfinished jobs")
+
+    async def _requeue_orphaned_jobs(self) -> None:
+        """Requeues the processing lists of workers whose lease has expired"""
+        prefix = f'{QUEUE_NAME}:processing:'
+        keys = await asyncio.to_thread(
+            lambda: list(redis_client.scan_iter(match=f'{prefix}*'))
+        )
+        for key in keys:
+            if key == PROCESSING_KEY:
+                continue
+            worker_id = key[len(prefix):]
+            count = await asyncio.to_thread(
+                self._requeue_orphaned,
+                keys=[key, WAIT_KEY, f'{QUEUE_NAME}:worker:{worker_id}']
+            )
+            if count:
+                logger.info(f"Requeued {count} jobs left by worker {worker_id}")
+
+    async def _keep_lease(self) -> None:
+        """Background loop: refresh this worker's lease, recover crashed workers' jobs"""
+        while True:
+            await asyncio.sleep(WORKER_LEASE_TTL / 3)
+            try:
+                await asyncio.to_thread(
+                    redis_client.set, LEASE_KEY, WORKER_ID, ex=WORKER_LEASE_TTL
+                )
+                await self._requeue_orphaned_jobs()
+            except Exception as e:
+                logger.error(f"Error refreshing worker lease: {str(e)}")
+
+    async def get_batch(self, max_items: int) -> list:
+        """
+        Gets the next prefetched job, plus any others already ready
+
+        Args:
+            max_items: Maximum number of jobs to return
+
+        Returns:
+            List of (job_json, job, image_bytes or Exception) tuples
+        """
+        items = [await self.queue.get()]
+        while len(items) < max_items and not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    async def _pop_jobs(self) -> list:
+        """
+        Pops up to batch_size jobs from Redis into the processing list
+
+        Run in a thread: redis-py is synchronous.
+
+        Returns:
+            List of job JSON strings (empty if no jobs within 5 seconds)
+        """
+        # Bull stores jobs in Redis lists
+        # Format: bull:queue-name:wait
+
+        # One round-trip for up to batch_size jobs
+        jobs = await asyncio.to_thread(
+            self._pop_batch, keys=[WAIT_KEY, PROCESSING_KEY], args=[self.batch_size]
+        )
+        if jobs:
+            return jobs
+
+        # Queue empty: block until a job arrives (5 second timeout)
+        job_json = await asyncio.to_thread(
+            redis_client.brpoplpush, WAIT_KEY, PROCESSING_KEY, timeout=5
+        )
+        return [job_json] if job_json else []
+
+    async def _download(self, job_json: str) -> tuple:
+        """Parses a job and downloads its image (errors passed to the consumer)"""
+        job = json.loads(job_json)
+        try:
+            image_bytes = await download_image(
+                self.http_client, job['data']['imageUrl'], blur_detector.max_bytes
+            )
+        except Exception as e:
+            image_bytes = e
+        return job_json, job, image_bytes
+
+    async def _run(self) -> None:
+        """Background loop: pop jobs, download images, enqueue"""
+        while True:
+            try:
+                job_jsons = await self._pop_jobs()
+
+                if not job_jsons:
+                    continue
+
+                # Download the popped jobs' images concurrently
+                items = await asyncio.gather(
+                    *[self._download(job_json) for job_json in job_jsons]
+                )
+
+                # Blocks when the queue is full (bounded prefetch)
+                for item in items:
+                    await self.queue.put(item)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"Error prefetching job: {str(e)}")
+                await asyncio.sleep(5)  # Wait before retrying
+
+
+async def process_job(job_data: dict, image_bytes: bytes) -> dict:
     """
-    Processes a single AI analysis job
+    Analyzes a single AI analysis job
+
+    The database update is done by the caller, batched with the other
+    jobs in the same batch (see worker_loop).
     
     Args:
         job_data: Job data from queue
@@ -65,31 +340,21 @@ async def process_job(job_data: dict) -> dict:
                 'projectId': str,
                 'imageUrl': str
             }
+        image_bytes: Prefetched image bytes
     
     Returns:
-        Analysis results
+        Analysis results, with photo_id added
     """
     photo_id = job_data['photoId']
-    image_url = job_data['imageUrl']
     
     logger.info(f"Processing job for photo {photo_id}")
     
     try:
-        # Analyze photo
-        result = blur_detector.analyze_from_url(image_url)
-        
-        # Update database
-        await update_photo_analysis(
-            photo_id=photo_id,
-            is_blurry=result['is_blurry'],
-            blur_score=result['blur_score'],
-            quality_score=result['quality_score'],
-            has_faces=result.get('has_faces', False),
-            face_count=result.get('face_count', 0),
-            exposure_score=result.get('exposure_score', None)
-        )
-        
-        logger.info(f"Job completed for photo {photo_id}: "
+        # Analyze photo (in a thread so the prefetcher keeps downloading)
+        result = await asyncio.to_thread(blur_detector.analyze_from_bytes, image_bytes)
+        result['photo_id'] = photo_id
+
+        logger.info(f"Job analyzed for photo {photo_id}: "
                    f"blur_score={result['blur_score']:.2f}, "
                    f"is_blurry={result['is_blurry']}")
         
@@ -100,43 +365,126 @@ async def process_job(job_data: dict) -> dict:
         raise
 
 
+async def _process_prefetched(job: dict, image_bytes) -> Optional[dict]:
+    """
+    Processes one prefetched job
+
+    Args:
+        job: Parsed job
+        image_bytes: Prefetched image bytes, or the download Exception
+
+    Returns:
+        Analysis results, or None if the job failed
+    """
+    try:
+        if isinstance(image_bytes, Exception):
+            raise image_bytes
+
+        return await process_job(job['data'], image_bytes)
+
+    except Exception as e:
+        logger.error(f"Error in worker loop: {str(e)}")
+        return None
+
+
+async def _store_results(analyzed: list) -> tuple:
+    """
+    Saves analysis results, in bulk when possible
+
+    Falls back to one update per photo if the bulk update fails, so a
+    single bad row (or a transient error) doesn't lose the whole batch.
+
+    Args:
+        analyzed: List of (job_json, result) tuples
+
+    Returns:
+        (completed, retry): job JSON strings whose results were saved, and
+        those whose update failed
+    """
+    if not analyzed:
+        return [], []
+
+    try:
+        # One executemany for the whole batch
+        await update_photo_analysis_bulk([result for _, result in analyzed])
+        return [job_json for job_json, _ in analyzed], []
+    except Exception as e:
+        logger.error(f"Error updating analysis results in bulk: {str(e)}")
+
+    completed, retry = [], []
+    for job_json, result in analyzed:
+        try:
+            await update_photo_analysis(
+                photo_id=result['photo_id'],
+                is_blurry=result['is_blurry'],
+                blur_score=result['blur_score'],
+                quality_score=result['quality_score'],
+                has_faces=result.get('has_faces', False),
+                face_count=result.get('face_count', 0),
+                exposure_score=result.get('exposure_score')
+            )
+            completed.append(job_json)
+        except Exception as e:
+            logger.error(f"Error updating analysis for photo {result['photo_id']}: {str(e)}")
+            retry.append(job_json)
+    return completed, retry
+
+
 async def worker_loop():
     """
     Main worker loop
     
-    Continuously polls Redis for jobs and processes them
+    Processes prefetched jobs in batches while the next images download
     """
     logger.info("Worker started, waiting for jobs...")
-    
-    while True:
+
+    # Pooled keep-alive connections + HTTP/2 (no handshake per job)
+    async with httpx.AsyncClient(
+        timeout=30,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    ) as http_client:
+        prefetcher = PrefetchQueue(
+            http_client,
+            maxsize=PREFETCH_SIZE,
+            batch_size=FETCH_BATCH_SIZE
+        )
+        await prefetcher.start()
+
         try:
-            # Get next job from queue (blocking pop with 5 second timeout)
-            # Bull stores jobs in Redis lists
-            # Format: bull:queue-name:wait
-            job_data = redis_client.brpop(f'{QUEUE_NAME}:wait', timeout=5)
-            
-            if job_data:
-                # Parse job data
-                _, job_json = job_data
-                job = json.loads(job_json)
-                
-                # Process job
-                result = await process_job(job['data'])
-                
-                # Mark job as completed
-                redis_client.lpush(f'{QUEUE_NAME}:completed', job_json)
-                
-            else:
-                # No jobs, wait a bit
-                await asyncio.sleep(1)
-                
-        except KeyboardInterrupt:
-            logger.info("Worker stopped by user")
-            break
-            
-        except Exception as e:
-            logger.error(f"Error in worker loop: {str(e)}")
-            await asyncio.sleep(5)  # Wait before retrying
+            while True:
+                try:
+                    # Next jobs with their images already downloaded
+                    items = await prefetcher.get_batch(FETCH_BATCH_SIZE)
+
+                    # Analyze jobs concurrently
+                    results = await asyncio.gather(
+                        *[_process_prefetched(job, image_bytes) for _, job, image_bytes in items]
+                    )
+                    analyzed = [(job_json, result) for (job_json, _, _), result
+                                in zip(items, results) if result is not None]
+
+                    # Update database (unsaved jobs are requeued, not dropped)
+                    completed, retry = await _store_results(analyzed)
+
+                    # Mark jobs as completed (one pipelined round-trip)
+                    await prefetcher.finish(
+                        [job_json for job_json, _, _ in items], completed, retry
+                    )
+
+                    if len(completed) < len(items):
+                        await asyncio.sleep(5)  # Wait before retrying
+                    
+                except KeyboardInterrupt:
+                    logger.info("Worker stopped by user")
+                    break
+                    
+                except Exception as e:
+                    logger.error(f"Error in worker loop: {str(e)}")
+                    await asyncio.sleep(5)  # Wait before retrying
+        finally:
+            await prefetcher.stop()
 
 
 def main():
@@ -145,7 +493,8 @@ def main():
     """
     logger.info("Starting AI Worker...")
     logger.info(f"Redis URL: {redis_url}")
-    logger.info(f"Queue: {QUEUE_NAME}")
+    logger.info(f"Queue: {QUEUE_NAME} (worker id: {WORKER_ID})")
+    logger.info(f"Prefetch size: {PREFETCH_SIZE}, fetch batch size: {FETCH_BATCH_SIZE}")
     logger.info(f"Blur threshold: {blur_detector.threshold}")
     
     # Test Redis connection